@@ -14,7 +14,7 @@
     'license': 'LGPL-3',
     'category': 'Parts Approver',
     'sequence': 170,
-    'version': '1.0',
+    'version': '1.2',
 
     'depends': ['base','inventory_custom_tracking_installation_delivery','industry_fsm','customer_app'],
 
@@ -26,7 +26,23 @@
         'views/part_model.xml',
         'views/part_approval_notification.xml',
         'views/res_company.xml',
+        'views/part_performance_views.xml',
+        'views/part_status_duration_views.xml',
+        'views/part_approval_dashboard_views.xml',
+        'views/part_notification_archive_views.xml',
+        'views/part_request_export_views.xml',
+        'views/part_request_import_views.xml',
+        'data/ir_cron.xml',
     ],
+    'assets': {
+        'web.assets_frontend': [
+            'parts_request/static/src/js/portal_parts_live_status.js',
+            'parts_request/static/src/js/portal_ticket_parts.js',
+        ],
+        'web.assets_backend': [
+            'parts_request/static/src/js/part_approval_list.js',
+        ],
+    },
     'demo': [
         'demo/demo.xml',
     ],
@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from . import controllers
+from . import metrics
+from . import api
+from . import export
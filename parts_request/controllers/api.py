@@ -0,0 +1,368 @@
+import base64
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+
+from odoo import http, fields, _
+from odoo.exceptions import AccessError, UserError
+from odoo.http import request
+
+from ..tools.profiling import instrumented
+
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 200
+
+# fields a client may select, per listed model; the first ones are returned
+# when no field is requested
+API_FIELDS = {
+    'project.task.part': ['task_id', 'product_id', 'status', 'coverage', 'amount', 'part_service_type'],
+    'part.approval.notification': ['task_id', 'part_id', 'part_name', 'status', 'coverage', 'sequence_fsm'],
+    'part.customer.approval.notification': ['task_id', 'part_id', 'part_name', 'stage', 'status', 'coverage',
+                                            'sequence_fsm', 'is_fully_paid'],
+}
+API_EVENT_BATCH_SIZE = 100
+SYNC_MODELS = ('project.task.part', 'part.approval.notification', 'part.customer.approval.notification')
+# changes are only synced once older than this, so that a transaction still
+# running with an older write_date cannot commit behind the cursor
+SYNC_SETTLE_SECONDS = 60
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor, is_valid):
+    """Return the position encoded in ``cursor``, a dict accepted by ``is_valid``."""
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise UserError(_("Invalid cursor."))
+    if not isinstance(position, dict) or not is_valid(position):
+        raise UserError(_("Invalid cursor."))
+    return position
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _is_datetime(value):
+    if not isinstance(value, str):
+        return False
+    try:
+        return bool(fields.Datetime.to_datetime(value))
+    except ValueError:
+        return False
+
+
+def _is_list_position(position):
+    """``{'id': <last id>}``"""
+    return position.keys() == {'id'} and _is_id(position['id'])
+
+
+def _is_sync_position(positions):
+    """``{<model>: [<write_date>, <id>], 'tombstone': <id>, 'date': <datetime>}``, models and tombstone optional."""
+    if not _is_datetime(positions.get('date')):
+        return False
+    for key, value in positions.items():
+        if key in SYNC_MODELS:
+            if not (isinstance(value, list) and len(value) == 2 and _is_datetime(value[0]) and _is_id(value[1])):
+                return False
+        elif key == 'tombstone':
+            if not _is_id(value):
+                return False
+        elif key != 'date':
+            return False
+    return True
+
+
+def serialize_records(records, fnames):
+    """Return ``records`` as small JSON dicts: many2one fields as ids, dates as strings."""
+    result = []
+    for values in records.read(fnames + ['write_date']):
+        for fname, value in values.items():
+            if isinstance(value, tuple):
+                values[fname] = value[0]
+            elif isinstance(value, (date, datetime)):
+                values[fname] = fields.Datetime.to_string(value) if isinstance(value, datetime) \
+                    else fields.Date.to_string(value)
+        result.append(values)
+    return result
+
+
+class PartsApiController(http.Controller):
+    """JSON endpoints of the parts flow for the mobile application.
+
+    Lists are paginated on id with an opaque cursor. They accept a subset of
+    ``API_FIELDS`` and the ``etag`` returned by a previous call, which makes
+    them answer ``{'not_modified': True}`` without reading any field when
+    the page did not change.
+    """
+
+    def _api_scope_domain(self, model_name):
+        """Records of ``model_name`` the current user may see, as assignee or customer of the task."""
+        user = request.env.user
+        if model_name == 'part.approval.notification' and not user.share:
+            # internal users are filtered by the record rules of the model
+            return []
+        return ['|', ('task_id.user_ids', 'in', [user.id]), ('task_id.partner_id', '=', user.partner_id.id)]
+
+    def _api_model(self, model_name):
+        Model = request.env[model_name]
+        if model_name == 'part.approval.notification' and not request.env.user.share:
+            return Model
+        return Model.sudo()
+
+    def _api_fields(self, model_name, requested):
+        allowed = API_FIELDS[model_name]
+        if not requested:
+            return list(allowed)
+        unknown = set(requested) - set(allowed)
+        if unknown:
+            raise UserError(_("Unknown fields: %s") % ', '.join(sorted(unknown)))
+        return list(requested)
+
+    def _api_list(self, model_name, fields_=None, cursor=None, limit=API_DEFAULT_LIMIT, etag=None, domain=None):
+        fnames = self._api_fields(model_name, fields_)
+        limit = max(1, min(int(limit or API_DEFAULT_LIMIT), API_MAX_LIMIT))
+        position = decode_cursor(cursor, _is_list_position)
+        search_domain = self._api_scope_domain(model_name) + list(domain or [])
+        if position:
+            search_domain.append(('id', '>', position['id']))
+
+        # one query for the ids and write dates of the page, the fields are
+        # only read when the client does not have the page yet
+        Model = self._api_model(model_name)
+        page = Model.search_fetch(search_domain, ['write_date'], limit=limit + 1, order='id')
+        has_more = len(page) > limit
+        page = page[:limit]
+        signature = [model_name, fnames, [(rec.id, fields.Datetime.to_string(rec.write_date)) for rec in page]]
+        page_etag = hashlib.sha1(json.dumps(signature).encode()).hexdigest()
+        request.future_response.headers['ETag'] = f'"{page_etag}"'
+
+        next_cursor = encode_cursor({'id': page[-1].id}) if has_more else None
+        if etag and etag.strip('"') == page_etag:
+            return {'not_modified': True, 'etag': page_etag, 'next_cursor': next_cursor}
+        return {
+            'records': serialize_records(page, fnames),
+            'etag': page_etag,
+            'next_cursor': next_cursor,
+        }
+
+    @http.route('/parts_request/api/parts', type='json', auth='user')
+    @instrumented('api.parts')
+    def api_parts(self, fields=None, cursor=None, limit=API_DEFAULT_LIMIT, etag=None, task_id=None, **kwargs):
+        domain = [('task_id', '=', int(task_id))] if task_id else []
+        return self._api_list('project.task.part', fields, cursor, limit, etag, domain)
+
+    @http.route('/parts_request/api/notifications', type='json', auth='user')
+    @instrumented('api.notifications')
+    def api_notifications(self, fields=None, cursor=None, limit=API_DEFAULT_LIMIT, etag=None, status=None, **kwargs):
+        domain = [('status', '=', status)] if status else []
+        return self._api_list('part.approval.notification', fields, cursor, limit, etag, domain)
+
+    @http.route('/parts_request/api/customer_requests', type='json', auth='user')
+    @instrumented('api.customer_requests')
+    def api_customer_requests(self, fields=None, cursor=None, limit=API_DEFAULT_LIMIT, etag=None, stage=None, **kwargs):
+        domain = [('stage', '=', stage)] if stage else []
+        return self._api_list('part.customer.approval.notification', fields, cursor, limit, etag, domain)
+
+    @http.route('/parts_request/api/sync', type='json', auth='user')
+    @instrumented('api.sync')
+    def api_sync(self, cursor=None, limit=API_MAX_LIMIT, **kwargs):
+        """Return the parts and notifications of the user's tasks changed or deleted since ``cursor``.
+
+        Without cursor, or when the cursor is older than the tombstone
+        retention, the full state is returned with ``reset`` set and the
+        client must drop its local copy first. Call again with the returned
+        cursor while ``has_more`` is set.
+        """
+        limit = max(1, min(int(limit or API_MAX_LIMIT), API_MAX_LIMIT))
+        positions = decode_cursor(cursor, _is_sync_position) or {}
+        Tombstone = request.env['part.sync.tombstone'].sudo()
+        now = fields.Datetime.now()
+        reset = not positions or fields.Datetime.to_datetime(positions['date']) < \
+            now - timedelta(days=Tombstone._get_retention_days())
+        if reset:
+            positions = {}
+        settled = now - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+        user = request.env.user
+        tasks = request.env['project.task'].sudo().with_context(active_test=False)._search(
+            ['|', ('user_ids', 'in', [user.id]), ('partner_id', '=', user.partner_id.id)])
+
+        changes = {}
+        has_more = False
+        for model_name in SYNC_MODELS:
+            domain = [('task_id', 'in', tasks), ('write_date', '<', settled)]
+            if model_name in positions:
+                write_date, last_id = positions[model_name]
+                domain += ['|', ('write_date', '>', write_date),
+                           '&', ('write_date', '=', write_date), ('id', '>', last_id)]
+            records = request.env[model_name].sudo().search(domain, limit=limit + 1, order='write_date, id')
+            if len(records) > limit:
+                has_more = True
+                records = records[:limit]
+            changes[model_name] = serialize_records(records, API_FIELDS[model_name])
+            if records:
+                positions[model_name] = [fields.Datetime.to_string(records[-1].write_date), records[-1].id]
+
+        deleted = {model_name: [] for model_name in SYNC_MODELS}
+        if reset:
+            # a full snapshot has nothing to delete, start after the last tombstone
+            last_tombstone = Tombstone.search([('date', '<', settled)], order='id desc', limit=1)
+            positions['tombstone'] = last_tombstone.id
+        else:
+            # the tombstones name the partner they are meant for, the task
+            # may be deleted; older ones only have the task
+            tombstones = Tombstone.search_read([
+                ('id', '>', positions.get('tombstone', 0)),
+                ('date', '<', settled),
+                '|', ('partner_id', '=', user.partner_id.id),
+                '&', ('partner_id', '=', False), ('task_id', 'in', tasks),
+            ], ['res_model', 'res_id'], limit=limit + 1, order='id')
+            if len(tombstones) > limit:
+                has_more = True
+                tombstones = tombstones[:limit]
+            for tombstone in tombstones:
+                deleted[tombstone['res_model']].append(tombstone['res_id'])
+            if tombstones:
+                positions['tombstone'] = tombstones[-1]['id']
+
+        # the retention is checked against the start of the last complete sync
+        if not has_more or 'date' not in positions:
+            positions['date'] = fields.Datetime.to_string(now)
+        return {
+            'reset': reset,
+            'changes': changes,
+            'deleted': deleted,
+            'has_more': has_more,
+            'cursor': encode_cursor(positions),
+        }
+
+    # ------------------------------------------------------------
+    # Transitions
+    # ------------------------------------------------------------
+
+    def _api_customer_request(self, request_id):
+        part_request = request.env['part.customer.approval.notification'].sudo().browse(int(request_id)).exists()
+        if not part_request or part_request.task_id.partner_id != request.env.user.partner_id:
+            raise AccessError(_("You cannot access this parts request."))
+        return part_request
+
+    def _api_transition_result(self, records, result):
+        model_name = records._name
+        return {
+            'result': result,
+            'records': serialize_records(records, API_FIELDS[model_name]),
+        }
+
+    @http.route('/parts_request/api/customer_requests/<int:request_id>/approve', type='json', auth='user')
+    @instrumented('api.customer_request_approve')
+    def api_customer_request_approve(self, request_id, **kwargs):
+        part_request = self._api_customer_request(request_id)
+        result, quotation = part_request._customer_approve()
+        response = self._api_transition_result(part_request, result)
+        if result == 'payment_required' and quotation:
+            response['order_id'] = quotation.id
+        return response
+
+    @http.route('/parts_request/api/customer_requests/<int:request_id>/reject', type='json', auth='user')
+    @instrumented('api.customer_request_reject')
+    def api_customer_request_reject(self, request_id, **kwargs):
+        part_request = self._api_customer_request(request_id)
+        result = 'rejected' if part_request._customer_reject() else 'ignored'
+        return self._api_transition_result(part_request, result)
+
+    @http.route('/parts_request/api/parts/receive', type='json', auth='user')
+    @instrumented('api.parts_receive')
+    def api_parts_receive(self, part_ids, **kwargs):
+        """Receive the given parts of the customer's tickets; parts already received are skipped."""
+        parts, result = self._api_receive_parts(part_ids)
+        return self._api_transition_result(parts, result)
+
+    def _api_receive_parts(self, part_ids):
+        parts = request.env['project.task.part'].sudo().browse([int(pid) for pid in part_ids]).exists()
+        if not parts or parts.task_id.partner_id != request.env.user.partner_id:
+            raise AccessError(_("You cannot receive these parts."))
+        receivable_status = request.env.company._get_portal_receivable_part_status()
+        receivable = parts.filtered(lambda p: p.status == receivable_status)
+        receivable._action_customer_receive()
+        return parts, 'received' if receivable else 'ignored'
+
+    @http.route('/parts_request/api/notifications/<int:notification_id>/pick_up', type='json', auth='user')
+    @instrumented('api.notification_pick_up')
+    def api_notification_pick_up(self, notification_id, **kwargs):
+        """Mark a shipped part as picked up by one of the assignees of the notification."""
+        notification, result = self._api_pick_up(notification_id)
+        return self._api_transition_result(notification, result)
+
+    def _api_pick_up(self, notification_id):
+        notification = request.env['part.approval.notification'].browse(int(notification_id)).exists()
+        if not notification:
+            raise AccessError(_("You cannot access this notification."))
+        notification.action_pick_up()
+        return notification, notification.status
+
+    # ------------------------------------------------------------
+    # Offline events
+    # ------------------------------------------------------------
+
+    @http.route('/parts_request/api/events', type='json', auth='user')
+    @instrumented('api.events')
+    def api_events(self, events, **kwargs):
+        """Apply an ordered batch of actions queued offline by the application.
+
+        Each event is ``{'key': <client idempotency key>, 'type': 'pick_up' |
+        'receive', 'notification_id' | 'part_ids': ...}``. Events run in
+        order, each in its own savepoint so that a failing one does not undo
+        the others, and an already applied key returns its stored result
+        instead of running again. Only applied events are stored, a failed
+        key can be sent again. A key delivered twice at the same time is
+        applied once: the second delivery waits for the first and is replayed
+        by the server, then gets the stored result. Return one result per
+        event.
+        """
+        if len(events) > API_EVENT_BATCH_SIZE:
+            raise UserError(_("At most %s events can be sent at once.") % API_EVENT_BATCH_SIZE)
+        if any(not isinstance(event, dict) or not event.get('key') for event in events):
+            raise UserError(_("Every event needs an idempotency key."))
+
+        Event = request.env['part.sync.event'].sudo()
+        applied = Event._get_results(request.env.user, [event['key'] for event in events])
+        handlers = {
+            'pick_up': lambda event: self._api_pick_up(event['notification_id'])[1],
+            'receive': lambda event: self._api_receive_parts(event['part_ids'])[1],
+        }
+
+        results = []
+        for event in events:
+            key = str(event['key'])
+            if key in applied:
+                results.append(dict(applied[key], key=key, duplicate=True))
+                continue
+            handler = handlers.get(event.get('type'))
+            try:
+                if not handler:
+                    raise UserError(_("Unknown event type: %s") % event.get('type'))
+                # the key is claimed with the changes of the event: both are
+                # kept or rolled back together, a failed key stays free
+                with request.env.cr.savepoint():
+                    event_id = Event._claim(request.env.user, key, event.get('type'))
+                    if not event_id:
+                        applied.update(Event._get_results(request.env.user, [key]))
+                        results.append(dict(applied.get(key, {'status': 'applied'}), key=key, duplicate=True))
+                        continue
+                    result = {'status': 'applied', 'result': handler(event)}
+                    Event._set_result(event_id, result)
+            except (UserError, AccessError, KeyError, ValueError, TypeError) as error:
+                # malformed events fail alone, not the whole batch
+                request.env.invalidate_all()
+                results.append({'status': 'error', 'error': str(error), 'key': key, 'duplicate': False})
+                continue
+            applied[key] = result
+            results.append(dict(result, key=key, duplicate=False))
+
+        return {'results': results}
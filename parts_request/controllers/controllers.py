@@ -2,31 +2,167 @@ from odoo import http, _
 from odoo.http import request
 from odoo.addons.customer_app.controllers.portal import PortalHomePage
 from odoo.tools import format_date
+from odoo.tools.lru import LRU
+from datetime import timezone
+from werkzeug.http import http_date
+import hashlib
 import logging
+import time
+
+from ..tools.profiling import instrumented
 
 _logger = logging.getLogger(__name__)
 
+# home page counters of the parts flow, per (database, partner, company)
+HOME_COUNTERS_TTL = 30
+_home_counters_cache = LRU(4096)
+HOME_COUNTERS = ('parts_pending_count', 'parts_partially_paid_count', 'parts_to_receive_count')
+
 class PortalHomeWithPartsRequest(PortalHomePage):
-    
+
+    def _parts_cache_validators(self, query, params, *keys):
+        """Return the (etag, last modified) of a portal parts page.
+
+        ``query`` must return the count and the max write_date of the rows
+        rendered by the page; ``keys`` are the request parameters changing the
+        rendering. The pages embed CSRF tokens, which are bound to the session
+        and expire: the validators change with the session and every day.
+        """
+        request.env.cr.execute(query, params)
+        count, last_write = request.env.cr.fetchone()
+        company = request.env.company
+        last_modified = max(filter(None, [last_write, company.write_date]))
+        signature = [
+            count, str(last_write), request.env.uid, request.session.sid, request.env.lang, company.id,
+            str(company.write_date), int(time.time() // 86400), *keys,
+        ]
+        etag = hashlib.sha1(repr(signature).encode()).hexdigest()
+        return etag, last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+    def _parts_not_modified(self, etag, last_modified):
+        """Return a 304 response when the client already has this version of the page, else None."""
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            fresh = httprequest.if_none_match.contains(etag)
+        else:
+            fresh = bool(httprequest.if_modified_since and httprequest.if_modified_since >= last_modified)
+        if not fresh:
+            return None
+        return request.make_response('', status=304, headers=self._parts_cache_headers(etag, last_modified))
+
+    def _parts_cache_headers(self, etag, last_modified):
+        return [
+            ('ETag', f'"{etag}"'),
+            ('Last-Modified', http_date(last_modified)),
+            ('Cache-Control', 'private, no-cache'),
+        ]
+
+    def _prepare_home_portal_values(self, counters):
+        values = super()._prepare_home_portal_values(counters)
+        if any(counter in counters for counter in HOME_COUNTERS):
+            parts_counters = self._get_parts_home_counters()
+            values.update({counter: parts_counters[counter] for counter in HOME_COUNTERS if counter in counters})
+        return values
+
+    def _get_parts_home_counters(self):
+        """Count the requests and parts waiting for the customer, in one query cached a few seconds."""
+        partner = request.env.user.partner_id
+        company = request.env.company
+        key = (request.env.cr.dbname, partner.id, company.id)
+        cached = _home_counters_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        request.env.cr.execute("""
+            SELECT notif.stage, COUNT(*)
+              FROM part_customer_approval_notification notif
+              JOIN project_task task ON task.id = notif.task_id
+             WHERE task.partner_id = %(partner)s
+               AND notif.coverage = 'chargeable'
+               AND notif.stage IN ('pending', 'partially_paid')
+          GROUP BY notif.stage
+         UNION ALL
+            SELECT 'to_receive', COUNT(*)
+              FROM project_task_part part
+              JOIN project_task task ON task.id = part.task_id
+             WHERE task.partner_id = %(partner)s
+               AND part.status = %(receivable_status)s
+        """, {'partner': partner.id, 'receivable_status': company._get_portal_receivable_part_status() or None})
+        counts = dict(request.env.cr.fetchall())
+        parts_counters = {
+            'parts_pending_count': counts.get('pending', 0),
+            'parts_partially_paid_count': counts.get('partially_paid', 0),
+            'parts_to_receive_count': counts.get('to_receive', 0),
+        }
+        _home_counters_cache[key] = (time.monotonic() + HOME_COUNTERS_TTL, parts_counters)
+        return parts_counters
+
+    def _prepare_parts_by_task(self, tasks):
+        """Map each task id to the notification of its "receive all" button
+        and whether all its parts can be received.
+
+        Parts and notifications of all ``tasks`` are read at once so the ticket
+        list templates render with a fixed number of queries, whatever the
+        number of rows.
+        """
+        receivable_status = request.env.company._get_portal_receivable_part_status()
+
+        part_statuses = {}
+        for part in request.env['project.task.part'].sudo().search_read(
+                [('task_id', 'in', tasks.ids)], ['task_id', 'status']):
+            part_statuses.setdefault(part['task_id'][0], []).append(part['status'])
+
+        parts_by_task = {}
+        for notification in request.env['part.approval.notification'].sudo().search_read(
+                [('task_id', 'in', tasks.ids)], ['task_id']):
+            task_id = notification['task_id'][0]
+            if task_id in parts_by_task:
+                continue
+            statuses = part_statuses.get(task_id, [])
+            parts_by_task[task_id] = {
+                'receive_notification_id': notification['id'],
+                'receive_ready': bool(
+                    receivable_status and statuses
+                    and all(status == receivable_status for status in statuses)
+                ),
+            }
+        return parts_by_task
+
     @http.route('/my/parts/request', type='http', auth="user", website=True)
-    def portal_my_parts_request(self, sortby='newest', filterby='all', groupby='', search='', **kwargs):
+    @instrumented('portal.portal_my_parts_request')
+    def portal_my_parts_request(self, sortby='', filterby='all', groupby='', search='', **kwargs):
         """Parts Request List View with sorting, filtering and grouping"""
         user = request.env.user
         partner = user.partner_id
+        sortby = sortby or ('relevance' if search else 'newest')
+
+        # answer 304 without searching nor rendering when no request of the
+        # customer, nor its part, changed since the cached version
+        # every source of the page: the requests, their parts and amounts, the
+        # quotations behind the amounts, the product names and the "payment
+        # required first" flag of the part products
+        validators = self._parts_cache_validators("""
+            SELECT COUNT(*), GREATEST(MAX(notif.write_date), MAX(part.write_date), MAX(tmpl.write_date),
+                                      MAX(quotation.write_date),
+                                      (SELECT MAX(write_date) FROM product_template WHERE is_part))
+              FROM part_customer_approval_notification notif
+              JOIN project_task task ON task.id = notif.task_id
+         LEFT JOIN project_task_part part ON part.id = notif.part_id
+         LEFT JOIN product_product product ON product.id = notif.product_id
+         LEFT JOIN product_template tmpl ON tmpl.id = product.product_tmpl_id
+         LEFT JOIN LATERAL (
+                SELECT MAX(so.write_date) AS write_date FROM sale_order so WHERE so.part_id = notif.part_id
+            ) quotation ON TRUE
+             WHERE task.partner_id = %s AND notif.coverage = 'chargeable'
+        """, (partner.id,), sortby, filterby, groupby, search)
+        not_modified = self._parts_not_modified(*validators)
+        if not_modified:
+            return not_modified
 
         # Base domain
         domain = [('task_id.partner_id', '=', partner.id),
                   ('coverage', '=', 'chargeable')]
 
-        # Search functionality
-        if search:
-            search_domain = ['|', '|', '|', '|',
-                             ('part_name', 'ilike', search),
-                             ('product_id.name', 'ilike', search),
-                             ('task_id.user_ids.name', 'ilike', search),
-                             ('stage', 'ilike', search)]
-            domain += search_domain
-
         # Sorting options
         sortings = {
             'newest': {'label': 'Newest First', 'order': 'create_date desc, id desc'},
@@ -34,6 +170,9 @@ class PortalHomeWithPartsRequest(PortalHomePage):
             'product': {'label': 'Product Name', 'order': 'product_id'},
             'stage': {'label': 'Stage', 'order': 'stage'},
         }
+        # Search goes through the trigram indexed search document, ranked
+        if search:
+            sortings['relevance'] = {'label': 'Relevance', 'order': None}
         order = sortings.get(sortby, sortings['newest'])['order']
 
         # Filtering options
@@ -52,11 +191,21 @@ class PortalHomeWithPartsRequest(PortalHomePage):
 
         parts_requests = []
         if 'part.customer.approval.notification' in request.env.registry.models:
-            parts_requests = request.env['part.customer.approval.notification'].sudo().search(
-                domain,
-                order=order
+            parts_requests = request.env['part.customer.approval.notification'].sudo()._search_portal(
+                domain, search, order=order,
             )
 
+        # Parts whose product must be paid before approval, read once for all rows
+        payment_first_part_names = set()
+        if parts_requests:
+            payment_first_part_names = {
+                product['name'] for product in request.env['product.template'].sudo().search_read([
+                    ('name', 'in', list(set(filter(None, parts_requests.mapped('part_name'))))),
+                    ('is_part', '=', True),
+                    ('payment_required_first', '=', True),
+                ], ['name'])
+            }
+
         # --- Grouping ---
         grouped_requests = {}
         if groupby and groupby != 'none':
@@ -105,6 +254,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
             }
         values = {
             'parts_requests': parts_requests,
+            'payment_first_part_names': payment_first_part_names,
             'page_name': 'parts_request',
             'sortby': sortby,
             'filterby': filterby,
@@ -128,9 +278,11 @@ class PortalHomeWithPartsRequest(PortalHomePage):
             'default_url': '/my/parts/request',
             'format_date': lambda date: format_date(request.env, date, date_format='dd/MM/yyyy') if date else 'N/A',
         }
-        return request.render("parts_request.parts_request_list_view", values)
+        return request.render("parts_request.parts_request_list_view", values,
+                              headers=self._parts_cache_headers(*validators))
 
     @http.route(['/my/view'], type='http', auth='user', website=True)
+    @instrumented('portal.my_tickets')
     def my_tickets(self, sortby='name', filterby='all', groupby='', search='', **kwargs):
 
         # Get the original render result
@@ -141,21 +293,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
             qcontext = response.qcontext
 
             calls = qcontext.get('calls')
-            if calls:
-                notification_model = request.env['part.approval.notification'].sudo()
-                notifications = notification_model.search([('task_id', 'in', calls.ids)])
-
-                for n in notifications:
-                    part_display = 'N/A'
-                    if hasattr(n, 'part_id') and n.part_id:
-                        part_display = getattr(n.part_id, 'part_name', False) or \
-                                       (getattr(n.part_id, 'product_id', False)
-                                        and n.part_id.product_id.display_name) or \
-                                       'Unknown Part'
-
-                # Create task-notification mapping
-                notifications_by_task = {n.task_id.id: n for n in notifications}
-                qcontext['notifications_by_task'] = notifications_by_task
+            qcontext['parts_by_task'] = self._prepare_parts_by_task(calls) if calls else {}
 
             # Finally, return updated response
             return response
@@ -163,6 +301,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
         return response
 
     @http.route(['/my/open/ticket'], type='http', auth='user', website=True)
+    @instrumented('portal.list_open_tickets')
     def list_open_tickets(self, sortby='recent', filterby='all', groupby='', search='', **kwargs):
 
         # Get the original render result
@@ -173,21 +312,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
             qcontext = response.qcontext
 
             calls = qcontext.get('calls')
-            if calls:
-                notification_model = request.env['part.approval.notification'].sudo()
-                notifications = notification_model.search([('task_id', 'in', calls.ids)])
-
-                for n in notifications:
-                    part_display = 'N/A'
-                    if hasattr(n, 'part_id') and n.part_id:
-                        part_display = getattr(n.part_id, 'part_name', False) or \
-                                       (getattr(n.part_id, 'product_id', False)
-                                        and n.part_id.product_id.display_name) or \
-                                       'Unknown Part'
-
-                # Create task-notification mapping
-                notifications_by_task = {n.task_id.id: n for n in notifications}
-                qcontext['notifications_by_task'] = notifications_by_task
+            qcontext['parts_by_task'] = self._prepare_parts_by_task(calls) if calls else {}
 
             # Finally, return updated response
             return response
@@ -195,6 +320,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
         return response
 
     @http.route(['/my/ticket/<int:ticket_id>'], type='http', auth='user', website=True)
+    @instrumented('portal.view_ticket')
     def view_ticket(self, ticket_id, **kw):
         # Call the existing controller logic directly
         response = PortalHomePage().view_ticket(ticket_id, **kw)
@@ -205,28 +331,47 @@ class PortalHomeWithPartsRequest(PortalHomePage):
 
             ticket = qcontext.get('ticket')
             if ticket:
-                notification_model = request.env['part.approval.notification'].sudo()
-                notifications = notification_model.search([('task_id', '=', ticket.id)])
-                
-                for n in notifications:
-                    part_display = 'N/A'
-                    if hasattr(n, 'part_id') and n.part_id:
-                        part_display = getattr(n.part_id, 'part_name', False) or \
-                                       (getattr(n.part_id, 'product_id', False)
-                                        and n.part_id.product_id.display_name) or \
-                                       'Unknown Part'
-
-                # Create task-notification mapping but don't add receive button logic
-                notifications_by_task = {n.task_id.id: n for n in notifications}
-                qcontext['notifications_by_task'] = notifications_by_task
+                # the parts themselves are loaded by /my/ticket/<id>/parts
+                # once the page is displayed
+                qcontext['has_part_requests'] = bool(request.env['part.approval.notification'].sudo().search_count(
+                    [('task_id', '=', ticket.id)], limit=1))
 
             # Finally, return updated response
             return response
         return response
 
-    @http.route('/part/receive/all/<int:notification_id>', type='http', auth='user', website=True)
+    @http.route(['/my/ticket/<int:ticket_id>/parts'], type='http', auth='user', website=True)
+    @instrumented('portal.ticket_parts')
+    def ticket_parts(self, ticket_id, **kw):
+        """Parts summary and receive panel of a ticket, as an HTML fragment for the ticket page."""
+        ticket = request.env['project.task'].sudo().browse(ticket_id).exists()
+        user = request.env.user
+        if not ticket or (ticket.partner_id != user.partner_id and user not in ticket.user_ids):
+            return request.not_found()
+
+        validators = self._parts_cache_validators("""
+            SELECT COUNT(*), GREATEST(MAX(part.write_date), MAX(tmpl.write_date))
+              FROM project_task_part part
+         LEFT JOIN product_template tmpl ON tmpl.id = part.product_id
+             WHERE part.task_id = %s
+        """, (ticket.id,), ticket.id)
+        not_modified = self._parts_not_modified(*validators)
+        if not_modified:
+            return not_modified
+
+        company = request.env.company
+        return request.render('parts_request.ticket_parts_fragment', {
+            'ticket': ticket,
+            'parts': ticket.part_ids,
+            'company': company,
+            'receivable_status': company._get_portal_receivable_part_status(),
+        }, headers=self._parts_cache_headers(*validators))
+
+    @http.route('/part/receive/all/<int:notification_id>', type='http', auth='user', website=True, methods=['POST'])
+    @instrumented('portal.receive_all_parts')
     def receive_all_parts(self, notification_id, **kw):
-        """Handle the Receive button logic for ALL parts in a task"""
+        """Handle the Receive button logic for ALL parts in a task, with the
+        ownership and status checks of ``receive_parts_bulk``."""
 
         notification = request.env['part.approval.notification'].sudo().browse(notification_id)
         if not notification.exists():
@@ -235,38 +380,21 @@ class PortalHomeWithPartsRequest(PortalHomePage):
         task = notification.task_id
         if not task:
             return request.not_found()
+        if task.partner_id != request.env.user.partner_id:
+            return request.redirect('/my/view')
 
-        # Fetch all related notifications for this task
-        all_notifications = request.env['part.approval.notification'].sudo().search([
-            ('task_id', '=', task.id)
-        ])
-
-        # Mark all related parts + notifications as received
-        for n in all_notifications:
-            n.status = 'received'
-            if n.part_id:
-                n.part_id.status = 'received'
-
-        # Post one summary message in task chatter
-        task.message_post(
-            body=_("Customer received all parts for this ticket.")
-        )
-
-        # Notify supervisor (if exists)
-        supervisor_user = None
-        if task.department_id:
-            supervisor_user = task.department_id.manager_id.user_id
-
-        if supervisor_user:
-            message_body = _(
-                "All parts for ticket %s have been marked as Received by the customer %s."
-            ) % (task.name, task.partner_id.name)
-            task.message_notify(
-                subject=f"Customer Received - {task.name}",
-                body=message_body,
-                partner_ids=[supervisor_user.partner_id.id],
-                subtype_xmlid='mail.mt_note',
-            )
+        # Mark the receivable parts + notifications of the task as received in
+        # bulk, with one summary message and one notification for the task
+        receivable_status = request.env.company._get_portal_receivable_part_status()
+        if receivable_status:
+            all_notifications = request.env['part.approval.notification'].sudo().search([
+                ('task_id', '=', task.id),
+                ('status', '=', receivable_status),
+            ])
+            all_notifications.part_id.filtered(lambda p: p.status == receivable_status)._action_customer_receive()
+            orphan_notifications = all_notifications.filtered(lambda n: not n.part_id)
+            if orphan_notifications:
+                orphan_notifications.write({'status': 'received'})
 
         # Redirect back smartly
         referrer = request.httprequest.referrer or ''
@@ -275,7 +403,37 @@ class PortalHomeWithPartsRequest(PortalHomePage):
         else:
             return request.redirect('/my/view')
 
+    @http.route('/part/receive/bulk', type='http', auth='user', website=True, methods=['POST'])
+    @instrumented('portal.receive_parts_bulk')
+    def receive_parts_bulk(self, part_ids='', ticket_id=None, **kw):
+        """Receive several parts at once, given as a list of part ids or a whole ticket.
+
+        Ownership is checked once for the whole batch and parts already
+        received are skipped, so the request can safely be retried.
+        """
+        partner = request.env.user.partner_id
+        Part = request.env['project.task.part'].sudo()
+
+        if ticket_id:
+            if not str(ticket_id).strip().isdigit():
+                return request.not_found()
+            parts = Part.search([('task_id', '=', int(ticket_id))])
+        else:
+            raw_ids = ','.join(request.httprequest.form.getlist('part_ids')) or part_ids
+            parts = Part.browse([int(pid) for pid in raw_ids.split(',') if pid.strip().isdigit()]).exists()
+        if not parts:
+            return request.not_found()
+
+        if parts.task_id.partner_id != partner:
+            return request.redirect('/my/view')
+
+        receivable_status = request.env.company._get_portal_receivable_part_status()
+        parts.filtered(lambda p: p.status == receivable_status)._action_customer_receive()
+
+        return request.redirect(request.httprequest.referrer or '/my/view')
+
     @http.route('/part/receive/form/<int:part_id>', type='http', auth='user', website=True, methods=['POST'])
+    @instrumented('portal.received_parts')
     def received_parts(self, part_id, **kw):
         """
         When user clicks 'Receive' button for a specific part,
@@ -289,10 +447,8 @@ class PortalHomeWithPartsRequest(PortalHomePage):
 
         part.sudo().write({'status': 'received'})
 
-        # Find related notification (optional)
-        notification = request.env['part.approval.notification'].sudo().search([('part_id', '=', part.id)], limit=1)
-        if notification:
-            notification.sudo().write({'status': 'received'})
+        # Related notification is synced by the part write
+        notification = part.approval_notification_id
 
         # Fetch related task
         task = part.task_id
@@ -333,6 +489,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
 
     @http.route('/my/parts/request/<int:request_id>/approve', type='http', auth="user", website=True, methods=['POST'],
                 csrf=True)
+    @instrumented('portal.parts_request_approve')
     def parts_request_approve(self, request_id, **kwargs):
         """Approve a parts request"""
         partner = request.env.user.partner_id
@@ -341,53 +498,16 @@ class PortalHomeWithPartsRequest(PortalHomePage):
             return request.redirect('/my/parts/request')
         if part_request.task_id.partner_id != partner:
             return request.redirect('/my/parts/request')
-        part_name = part_request.part_name
-        if part_name:
-            product_template = request.env['product.template'].sudo().search([
-                ('name', '=', part_name),
-                ('is_part', '=', True)
-            ], limit=1)
-            task = part_request.task_id
-            part = part_request.part_id
-            quotation = request.env['sale.order'].sudo().search([
-                ('ticket_id', '=', task.id),
-                ('part_id','=',part.id)
-            ], limit=1)
-        if product_template and product_template.is_part:
-            if product_template.payment_required_first:
-                # Case 1: Payment required first redirect to quotation
-                if quotation:
-                    return request.redirect(f'/my/orders/{quotation.id}')
-                else:
-                    # No quotation yet — optional fallback
-                    return request.redirect('/my/parts/request')
-            else:
-                part_request.action_approve()
-
-                # Case 2: No payment required notify supervisor
-                supervisor = task.department_id.manager_id if task.department_id else False
-                assignees = task.user_ids
-
-                partner_ids = assignees.mapped('partner_id').ids
-                if supervisor and supervisor.user_id and supervisor.user_id.partner_id:
-                    partner_ids.append(supervisor.user_id.partner_id.id)
-
-                if supervisor:
-                    message = _(
-                        "Customer %s has approved a parts request for part '%s'."
-                    ) % (partner.name, part_name)
-                    task.message_post(
-                        body=message,
-                        subject="Customer Approved",
-                        partner_ids=partner_ids,
-                        message_type='notification',
-                        subtype_xmlid='mail.mt_comment',
-                    )
 
+        result, quotation = part_request._customer_approve()
+        if result == 'payment_required' and quotation:
+            # Payment required first redirect to quotation
+            return request.redirect(f'/my/orders/{quotation.id}')
         return request.redirect('/my/parts/request')
 
     @http.route('/my/parts/request/<int:request_id>/reject', type='http', auth="user", website=True, methods=['POST'],
                 csrf=True)
+    @instrumented('portal.parts_request_reject')
     def parts_request_reject(self, request_id, **kwargs):
         """Reject a parts request"""
         partner = request.env.user.partner_id
@@ -397,46 +517,11 @@ class PortalHomeWithPartsRequest(PortalHomePage):
         if part_request.task_id.partner_id != partner:
             return request.redirect('/my/parts/request')
 
-        # Reject the part request
-        part_request.action_reject()
-
-        task = part_request.task_id
-        part = part_request.part_id
-        part_name = part_request.part_name
-
-        # Notify task assignees
-        if task and task.user_ids:
-            message = _(
-                "Customer %s has rejected a parts request for part '%s'."
-            ) % (partner.name, part_name)
-            task.message_notify(
-                body=message,
-                subject="Customer Rejected",
-                partner_ids=task.user_ids.mapped('partner_id').ids,
-                subtype_xmlid='mail.mt_note',
-            )
-            task.message_post(
-                body=message,
-                subject="Customer Rejected",
-                subtype_xmlid='mail.mt_note',
-            )
-
-        # Cancel quotation
-        quotation = request.env['sale.order'].sudo().search([
-            ('ticket_id', '=', task.id),
-            ('part_id','=',part.id)
-        ], limit=1)
-        if quotation and quotation.state not in ('cancel', 'done'):
-            quotation.sudo().action_cancel()
-            quotation.sudo().write({'state': 'cancel'})
-            if task.task_part_ids:
-                target_part = task.task_part_ids.filtered(lambda p: p.id == part.id)
-                if target_part:
-                    target_part.sudo().write({'has_cancelled_quotation': True})
-
+        part_request._customer_reject()
         return request.redirect('/my/parts/request')
 
     @http.route('/my/parts/request/<int:request_id>/pay', type='http', auth="user", website=True, methods=['POST'], csrf=True)
+    @instrumented('portal.parts_request_pay')
     def parts_request_pay(self, request_id, **kwargs):
         """Redirect to Quotation for approved part"""
         part_request = request.env['part.customer.approval.notification'].sudo().browse(request_id)
@@ -465,6 +550,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
             return request.redirect('/my/parts/request')
 
     @http.route('/my/parts/request/<int:request_id>/partial_pay', type='http', auth="user", website=True, methods=['POST'], csrf=True)
+    @instrumented('portal.parts_request_partial_pay')
     def parts_request_partial_pay(self, request_id, **kwargs):
         """Redirect customer to the correct unpaid invoice for the ticket-part quotation."""
         request_rec = request.env['part.customer.approval.notification'].sudo().browse(request_id)
@@ -500,6 +586,7 @@ class PortalHomeWithPartsRequest(PortalHomePage):
 class PaymentRedirectController(http.Controller):
 
     @http.route(['/payment/status'], type='http', auth='public', website=True, csrf=False)
+    @instrumented('portal.payment_status_redirect')
     def payment_status_redirect(self, **post):
 
         tx = request.env['payment.transaction'].sudo().search([], order='id desc', limit=1)
@@ -557,64 +644,4 @@ class PaymentRedirectController(http.Controller):
         if not sale_order:
             return
 
-        task = getattr(sale_order, 'ticket_id', False)
-        part = getattr(sale_order, 'part_id', False)
-        parts_notification = request.env['part.approval.notification'].sudo().search([
-            ('task_id', '=', task.id),
-            ('part_id', '=', part.id)
-        ], limit=1)
-
-        part_name = (
-            part.product_id.display_name
-            if part and part.product_id
-            else part.part_name or _('Unnamed Part')
-        )
-
-        if not task:
-            return
-
-
-        # Notify payment info
-        paid_amount = invoice.amount_total - invoice.amount_residual
-        task.message_post(
-            # body=f"Customer paid {paid_amount} / {invoice.amount_total} for {invoice.name}.",
-            body=f"Customer has fully paid for ticket {task.name}. Part {part_name} is now approved.",
-            subject="Customer Payment Update",
-            subtype_xmlid='mail.mt_note',
-        )
-
-        # Handle full or partial
-        if invoice.amount_residual == 0:
-            notif = request.env['part.customer.approval.notification'].sudo().search([
-                ('task_id', '=', task.id),
-                ('part_id', '=', part.id)
-            ], limit=1)
-
-            if notif:
-                notif.stage = 'approved'
-                # sale_order.part_id.status = 'customer_approved'
-                notif.is_fully_paid = True
-                part.status = 'customer_approved'
-
-            # Notify users
-            partner_ids = task.user_ids.mapped('partner_id').ids
-            if task.department_id.manager_id and task.department_id.manager_id.user_id:
-                partner_ids.append(task.department_id.manager_id.user_id.partner_id.id)
-
-            parts_notification.message_notify(
-                body=f"Customer has fully paid for ticket {task.name}. Part {part_name} is now approved.",
-                subject="Full Payment Completed",
-                partner_ids=partner_ids,
-                subtype_xmlid='mail.mt_note',
-            )
-            parts_notification.message_post(
-                body=f"Customer has fully paid for ticket {task.name}. Part {part_name} is now approved.",
-                subject="Full Payment Completed",
-                subtype_xmlid='mail.mt_note',
-            )
-        else:
-            task.message_post(
-                body=f"Partial payment received for {invoice.name}. Remaining {invoice.amount_residual}.",
-                subject="Partial Payment",
-                subtype_xmlid='mail.mt_note',
-            )
+        sale_order._handle_part_invoice_payment(invoice)
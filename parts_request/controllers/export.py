@@ -0,0 +1,54 @@
+from odoo import http
+from odoo.http import request, Response, content_disposition
+
+from ..tools.export import EXPORT_STREAMS, build_export_query
+from ..tools.profiling import instrumented
+
+
+def _export_response(file_format, filename, header, query, params, formatter):
+    """Stream the export, its rows are read after the request cursor is released."""
+    content_type, stream = EXPORT_STREAMS[file_format]
+    return Response(
+        stream(request.env.cr.dbname, header, query, params, formatter),
+        headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', content_disposition(filename)),
+            ('Cache-Control', 'no-store'),
+        ],
+        direct_passthrough=True,
+    )
+
+
+class PartsRequestExport(http.Controller):
+
+    @http.route('/parts_request/export/<int:wizard_id>', type='http', auth='user')
+    @instrumented('export.export_parts')
+    def export_parts(self, wizard_id, **kwargs):
+        wizard = request.env['part.request.export'].browse(wizard_id).exists()
+        if not wizard or wizard.create_uid != request.env.user:
+            raise request.not_found()
+        header, query, params = wizard._get_export_query()
+        formatter = wizard._get_export_formatter(wizard.res_model)
+        return _export_response(wizard.file_format, wizard._get_export_filename(),
+                                header, query, params, formatter)
+
+    @http.route('/my/parts/request/export', type='http', auth='user', website=True)
+    @instrumented('portal.export_parts')
+    def portal_export_parts(self, file_format='xlsx', filterby='all', **kwargs):
+        """Download the chargeable parts requests of the customer, as listed on the portal."""
+        if file_format not in EXPORT_STREAMS:
+            raise request.not_found()
+        res_model = 'part.customer.approval.notification'
+        extra_where, extra_params = ["notif.coverage = 'chargeable'"], {}
+        if filterby in ('pending', 'approved', 'rejected', 'partially_paid'):
+            extra_where.append("notif.stage = %(stage)s")
+            extra_params['stage'] = filterby
+        header, query, params = build_export_query(
+            res_model,
+            partner_id=request.env.user.partner_id.id,
+            extra_where=extra_where,
+            extra_params=extra_params,
+            lang=request.env.lang or 'en_US',
+        )
+        formatter = request.env['part.request.export'].sudo()._get_export_formatter(res_model)
+        return _export_response(file_format, f'parts_requests.{file_format}', header, query, params, formatter)
@@ -0,0 +1,157 @@
+import hmac
+import logging
+
+from odoo import http
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+# Buckets (seconds) of the pending age histograms
+PENDING_AGE_BUCKETS = (3600, 4 * 3600, 24 * 3600, 3 * 24 * 3600, 7 * 24 * 3600)
+PENDING_QUEUES = {
+    'supervisor': 'draft',
+    'warehouse': 'waiting_warehouse_manager',
+}
+# Customer approval stages whose counts are exported
+CUSTOMER_OPEN_STAGES = ('pending', 'partially_paid')
+# Window of the per-action latency metrics
+ACTION_WINDOW_MINUTES = 60
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PartsMetricsExporter:
+    """Build the Prometheus text exposition of the parts workflow metrics.
+
+    Every value comes from the dashboard materialized view or from an
+    aggregate query answered by an index, the tables are never scanned row
+    by row.
+    """
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.lines = []
+
+    def _metric(self, name, metric_type, help_text, samples):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            self.lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+    def _notification_counts(self):
+        # from the dashboard materialized view, every notification is counted
+        # once under its supervisor
+        self.cr.execute("""
+            SELECT company_id, status, SUM(notification_count)
+              FROM part_approval_dashboard
+             WHERE role = 'supervisor'
+          GROUP BY company_id, status
+        """)
+        self._metric(
+            'parts_request_notifications', 'gauge',
+            'Part approval notifications per company and status, as of the last dashboard refresh.',
+            [({'company_id': company_id or 0, 'status': status or ''}, count)
+             for company_id, status, count in self.cr.fetchall()])
+
+        # only the open stages: the closed ones grow forever and would need
+        # a scan of the whole table
+        self.cr.execute("""
+            SELECT stage, COUNT(*)
+              FROM part_customer_approval_notification
+             WHERE stage IN %s
+          GROUP BY stage
+        """, (CUSTOMER_OPEN_STAGES,))
+        counts = dict(self.cr.fetchall())
+        self._metric(
+            'parts_request_customer_notifications', 'gauge', 'Customer approval notifications per open stage.',
+            [({'stage': stage}, counts.get(stage, 0)) for stage in CUSTOMER_OPEN_STAGES])
+
+    def _pending_ages(self):
+        name = 'parts_request_pending_age_seconds'
+        self.lines.append(f'# HELP {name} Time since the last change of notifications waiting in a queue.')
+        self.lines.append(f'# TYPE {name} histogram')
+        buckets = ', '.join(
+            f"COUNT(*) FILTER (WHERE write_date >= now() at time zone 'UTC' - interval '{age} seconds')"
+            for age in PENDING_AGE_BUCKETS)
+        for queue, status in PENDING_QUEUES.items():
+            self.cr.execute(f"""
+                SELECT {buckets}, COUNT(*),
+                       COALESCE(SUM(EXTRACT(EPOCH FROM (now() at time zone 'UTC' - write_date))), 0)
+                  FROM part_approval_notification
+                 WHERE status = %s
+            """, (status,))
+            *counts, total, age_sum = self.cr.fetchone()
+            for age, count in zip(PENDING_AGE_BUCKETS, counts):
+                self.lines.append(f'{name}_bucket{{queue="{queue}",le="{age}"}} {count}')
+            self.lines.append(f'{name}_bucket{{queue="{queue}",le="+Inf"}} {total}')
+            self.lines.append(f'{name}_sum{{queue="{queue}"}} {age_sum}')
+            self.lines.append(f'{name}_count{{queue="{queue}"}} {total}')
+
+    def _mail_backlog(self):
+        self.cr.execute("""
+            SELECT state, COUNT(*)
+              FROM mail_mail
+             WHERE state IN ('outgoing', 'exception')
+          GROUP BY state
+        """)
+        counts = dict(self.cr.fetchall())
+        self._metric(
+            'parts_request_mail_backlog', 'gauge', 'Outgoing emails waiting to be sent or in error.',
+            [({'state': state}, counts.get(state, 0)) for state in ('outgoing', 'exception')])
+
+    def _action_latencies(self):
+        self.cr.execute("""
+            SELECT action, SUM(call_count), SUM(total_time), SUM(total_queries), SUM(total_sql_time)
+              FROM part_performance_metric
+             WHERE bucket >= now() at time zone 'UTC' - %s * interval '1 minute'
+          GROUP BY action
+        """, (ACTION_WINDOW_MINUTES,))
+        rows = self.cr.fetchall()
+        window = f'over the last {ACTION_WINDOW_MINUTES} minutes'
+        self._metric('parts_request_action_calls', 'gauge', f'Instrumented calls {window}.',
+                     [({'action': row[0]}, row[1]) for row in rows])
+        self._metric('parts_request_action_seconds', 'gauge', f'Wall time spent in instrumented calls {window}.',
+                     [({'action': row[0]}, row[2]) for row in rows])
+        self._metric('parts_request_action_queries', 'gauge', f'SQL queries of instrumented calls {window}.',
+                     [({'action': row[0]}, row[3]) for row in rows])
+        self._metric('parts_request_action_sql_seconds', 'gauge', f'SQL time of instrumented calls {window}.',
+                     [({'action': row[0]}, row[4]) for row in rows])
+
+    def export(self):
+        self._notification_counts()
+        self._pending_ages()
+        self._mail_backlog()
+        self._action_latencies()
+        return '\n'.join(self.lines) + '\n'
+
+
+class PartsMetricsController(http.Controller):
+
+    @http.route('/parts_request/metrics', type='http', auth='none', methods=['GET'], csrf=False, save_session=False)
+    def parts_metrics(self, **kwargs):
+        """Prometheus metrics of the parts workflow, protected by the
+        ``parts_request.metrics_token`` system parameter, sent as an
+        ``Authorization: Bearer`` header. A missing or wrong token gets a
+        401, a database without token a 403."""
+        if not request.db:
+            return request.not_found()
+        expected = request.env['ir.config_parameter'].sudo().get_param('parts_request.metrics_token')
+        authorization = request.httprequest.headers.get('Authorization', '')
+        if not expected:
+            return request.make_response('Forbidden', status=403, headers=[('Content-Type', 'text/plain')])
+        given = authorization[7:] if authorization.startswith('Bearer ') else None
+        # compared as bytes: compare_digest rejects non-ASCII strings
+        if not given or not hmac.compare_digest(expected.encode(), given.encode()):
+            return request.make_response('Unauthorized', status=401, headers=[
+                ('Content-Type', 'text/plain'),
+                ('WWW-Authenticate', 'Bearer'),
+            ])
+
+        body = PartsMetricsExporter(request.env.cr).export()
+        return request.make_response(body, headers=[
+            ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+            ('Cache-Control', 'no-store'),
+        ])
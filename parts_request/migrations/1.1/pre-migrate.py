@@ -0,0 +1,37 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def _dedupe_task_parts(cr, table, model):
+    """Delete duplicated (task_id, part_id) rows, keeping the oldest one.
+
+    The oldest row is the one every ``search(..., limit=1)`` of the module
+    returned, hence the one whose state has been kept up to date.
+    """
+    cr.execute("SELECT to_regclass(%s)", (table,))
+    if not cr.fetchone()[0]:
+        return
+    cr.execute(f"""
+        DELETE FROM {table} dup
+         USING {table} keep
+         WHERE dup.task_id = keep.task_id
+           AND dup.part_id = keep.part_id
+           AND dup.id > keep.id
+     RETURNING dup.id
+    """)
+    ids = tuple(row[0] for row in cr.fetchall())
+    if not ids:
+        return
+    # mail.thread data is not linked by foreign keys, drop it along the rows
+    cr.execute("DELETE FROM mail_message WHERE model = %s AND res_id IN %s", (model, ids))
+    cr.execute("DELETE FROM mail_followers WHERE res_model = %s AND res_id IN %s", (model, ids))
+    cr.execute("DELETE FROM mail_activity WHERE res_model = %s AND res_id IN %s", (model, ids))
+    _logger.info("Removed %s duplicated %s records before adding the unique constraint", len(ids), model)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    _dedupe_task_parts(cr, 'part_approval_notification', 'part.approval.notification')
+    _dedupe_task_parts(cr, 'part_customer_approval_notification', 'part.customer.approval.notification')
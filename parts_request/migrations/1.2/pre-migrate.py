@@ -0,0 +1,32 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Fill the columns denormalized for the record rules in SQL.
+
+    The ORM would otherwise recompute them record by record when the module
+    is updated; it skips the columns that already exist.
+    """
+    cr.execute("SELECT to_regclass('part_approval_notification')")
+    if not cr.fetchone()[0]:
+        return
+    cr.execute("""
+        ALTER TABLE part_approval_notification
+            ADD COLUMN IF NOT EXISTS supervisor_user_id integer,
+            ADD COLUMN IF NOT EXISTS task_company_id integer
+    """)
+    cr.execute("""
+        UPDATE part_approval_notification notif
+           SET supervisor_user_id = employee.user_id
+          FROM hr_employee employee
+         WHERE employee.id = notif.supervisor_id
+    """)
+    cr.execute("""
+        UPDATE part_approval_notification notif
+           SET task_company_id = task.company_id
+          FROM project_task task
+         WHERE task.id = notif.task_id
+    """)
+    _logger.info("Filled the record rule columns of %s approval notifications", cr.rowcount)
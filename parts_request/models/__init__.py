@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
 
+from . import part_workflow_mixin
 from . import contract_type
 from . import part_model
 from . import part_approval_notification
 from . import res_company
+from . import part_performance_metric
+from . import part_status_transition
+from . import part_approval_dashboard
+from . import part_notification_archive
+from . import part_sync_tombstone
+from . import part_sync_event
+from . import part_request_export
+from . import part_request_import
+from . import stock_move
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+
+AGE_BUCKETS = [
+    ('0_1d', '< 1 day'),
+    ('1_3d', '1-3 days'),
+    ('3_7d', '3-7 days'),
+    ('7_30d', '7-30 days'),
+    ('30d', '> 30 days'),
+]
+
+# age bucket -> (min days, max days) since the last change of the notification
+AGE_BUCKET_DAYS = {
+    '0_1d': (0, 1),
+    '1_3d': (1, 3),
+    '3_7d': (3, 7),
+    '7_30d': (7, 30),
+    '30d': (30, None),
+}
+
+
+class PartApprovalDashboard(models.Model):
+    """Notification counts per supervisor and warehouse manager.
+
+    Backed by a materialized view refreshed by a cron, so the dashboard never
+    scans ``part_approval_notification`` nor evaluates its record rules.
+    """
+    _name = 'part.approval.dashboard'
+    _description = 'Parts Approval Dashboard'
+    _auto = False
+    _order = 'user_id, status, age_bucket'
+
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+    role = fields.Selection([
+        ('supervisor', 'Supervisor'),
+        ('warehouse_manager', 'Warehouse Manager'),
+    ], string='Role', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    status = fields.Selection(
+        lambda self: self.env['part.approval.notification']._fields['status'].selection,
+        string='Status', readonly=True)
+    coverage = fields.Selection([('foc', 'FOC'), ('chargeable', 'Chargeable')], string='Coverage', readonly=True)
+    warehouse_id = fields.Many2one('stock.warehouse', string='Warehouse', readonly=True)
+    age_bucket = fields.Selection(AGE_BUCKETS, string='Age', readonly=True)
+    notification_count = fields.Integer(string='Notifications', readonly=True)
+    refresh_date = fields.Datetime(string='Refreshed On', readonly=True)
+
+    def init(self):
+        self.env.cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self._table} CASCADE")
+        self.env.cr.execute(f"""
+            CREATE MATERIALIZED VIEW {self._table} AS (
+                WITH owners AS (
+                    SELECT supervisor_user_id AS user_id, 'supervisor' AS role, company_id, status,
+                           coverage, warehouse_id, write_date
+                      FROM part_approval_notification
+                     WHERE supervisor_user_id IS NOT NULL
+                 UNION ALL
+                    SELECT manager_user_id, 'warehouse_manager', company_id, status,
+                           coverage, warehouse_id, write_date
+                      FROM part_approval_notification
+                     WHERE manager_user_id IS NOT NULL
+                ), aged AS (
+                    SELECT user_id, role, company_id, status, coverage, warehouse_id,
+                           CASE
+                               WHEN write_date > now() at time zone 'UTC' - interval '1 day' THEN '0_1d'
+                               WHEN write_date > now() at time zone 'UTC' - interval '3 days' THEN '1_3d'
+                               WHEN write_date > now() at time zone 'UTC' - interval '7 days' THEN '3_7d'
+                               WHEN write_date > now() at time zone 'UTC' - interval '30 days' THEN '7_30d'
+                               ELSE '30d'
+                           END AS age_bucket
+                      FROM owners
+                )
+                SELECT row_number() OVER (ORDER BY user_id, role, company_id, status,
+                                                   coverage, warehouse_id, age_bucket) AS id,
+                       user_id, role, company_id, status, coverage, warehouse_id, age_bucket,
+                       count(*) AS notification_count,
+                       now() at time zone 'UTC' AS refresh_date
+                  FROM aged
+              GROUP BY user_id, role, company_id, status, coverage, warehouse_id, age_bucket
+            )
+        """)
+        # the unique index is required by REFRESH ... CONCURRENTLY
+        self.env.cr.execute(f"CREATE UNIQUE INDEX {self._table}_id_index ON {self._table} (id)")
+        self.env.cr.execute(f"CREATE INDEX {self._table}_user_id_index ON {self._table} (user_id)")
+
+    @api.model
+    def _cron_refresh(self):
+        self.env.flush_all()
+        self.env.cr.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        self.env.invalidate_all()
+
+    def action_open_notifications(self):
+        """Open the notifications counted in this dashboard line."""
+        self.ensure_one()
+        owner_field = 'supervisor_user_id' if self.role == 'supervisor' else 'manager_user_id'
+        domain = [
+            (owner_field, '=', self.user_id.id),
+            ('company_id', '=', self.company_id.id),
+            ('status', '=', self.status),
+            ('coverage', '=', self.coverage),
+            ('warehouse_id', '=', self.warehouse_id.id),
+        ]
+        min_days, max_days = AGE_BUCKET_DAYS[self.age_bucket]
+        now = fields.Datetime.now()
+        domain.append(('write_date', '<=', now - timedelta(days=min_days)))
+        if max_days:
+            domain.append(('write_date', '>', now - timedelta(days=max_days)))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Parts'),
+            'res_model': 'part.approval.notification',
+            'view_mode': 'tree,form',
+            'domain': domain,
+        }
@@ -1,8 +1,11 @@
-from odoo import models, fields, api,_
+from odoo import models, fields, api, tools, Command, _
 from odoo.exceptions import UserError, AccessError
 from odoo.osv.expression import expression
+from odoo.tools import SQL
 import logging
 
+from ..tools.profiling import instrumented
+
 _logger = logging.getLogger(__name__)
 
 
@@ -10,11 +13,11 @@ class PartApprovalNotification(models.Model):
     _name = 'part.approval.notification'
     _description = 'Part Approval Notification'
     _rec_name = 'task_id'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'part.workflow.mixin']
 
     task_id = fields.Many2one('project.task', string='Call Name', readonly=True, ondelete='cascade', )
     product_id = fields.Many2one('product.product', string='Product', readonly=True, ondelete='cascade', )
-    part_id = fields.Many2one('project.task.part', string='Part', readonly=True)
+    part_id = fields.Many2one('project.task.part', string='Part', readonly=True, index=True)
     user_ids = fields.Many2many('res.users', string='Assignee', readonly=True)
     part_name = fields.Char(string='Part Name', readonly=True)
     supervisor_id = fields.Many2one('hr.employee', string='Supervisor', readonly=True)
@@ -37,7 +40,24 @@ class PartApprovalNotification(models.Model):
     ], string='Status', default='draft', tracking=True)
 
     manager = fields.Many2one('hr.employee', "Manager", domain=[('warehouse_manager', '=', True)])
-    manager_user_id = fields.Many2one('res.users', related='manager.user_id', store=True)
+    manager_user_id = fields.Many2one('res.users', related='manager.user_id', store=True, index='btree_not_null')
+    warehouse_id = fields.Many2one('stock.warehouse', string='Warehouse', readonly=True)
+    move_ids = fields.One2many('stock.move', 'part_notification_id', string='Stock Moves', readonly=True)
+    # stored so that creating the transfer updates the notification row:
+    # a concurrent run locking it afterwards fails instead of reading a
+    # snapshot without the moves
+    picking_id = fields.Many2one('stock.picking', string='Transfer', compute='_compute_picking_id', store=True,
+                                 index='btree_not_null')
+
+    # denormalized for the record rules, which would otherwise join through
+    # hr.employee, project.task and the task assignees on every search
+    supervisor_user_id = fields.Many2one('res.users', related='supervisor_id.user_id', store=True,
+                                         index='btree_not_null')
+    task_company_id = fields.Many2one('res.company', related='task_id.company_id', store=True,
+                                      index='btree_not_null')
+    allowed_user_ids = fields.Many2many('res.users', 'part_approval_notification_allowed_user_rel',
+                                        'notification_id', 'user_id', string='Allowed Users',
+                                        compute='_compute_allowed_user_ids', store=True)
 
     show_pick_up_button = fields.Boolean(compute='_compute_show_pick_up_button')
     show_stock_button = fields.Boolean(compute='_compute_show_stock_button')
@@ -48,6 +68,32 @@ class PartApprovalNotification(models.Model):
         store=False
     )
 
+    # one approval request per part of a task; the unique index also serves
+    # the (task_id, part_id) and task_id lookups done by the payment hooks
+    _sql_constraints = [
+        ('task_part_uniq', 'unique(task_id, part_id)',
+         'An approval request already exists for this part of the task.'),
+    ]
+
+    def init(self):
+        super().init()
+        # aggregate counts per company/status and pending age per queue
+        # (metrics endpoint) are answered from these indexes
+        tools.create_index(self._cr, 'part_approval_notification_company_status_index',
+                           self._table, ['company_id', 'status'])
+        tools.create_index(self._cr, 'part_approval_notification_status_write_date_index',
+                           self._table, ['status', 'write_date'])
+        self._create_sync_index()
+
+    def unlink(self):
+        self.env['part.sync.tombstone']._record(self)
+        return super().unlink()
+
+    @api.depends('task_id.user_ids')
+    def _compute_allowed_user_ids(self):
+        for rec in self:
+            rec.allowed_user_ids = rec.task_id.user_ids
+
     @api.depends('coverage', 'status')
     def _compute_show_request_button(self):
         """Compute visibility for 'Request' button based on coverage and approval/payment flow."""
@@ -123,11 +169,36 @@ class PartApprovalNotification(models.Model):
             _logger.debug('No warehouse detected for product %s', product.id)
             return
 
+        self.warehouse_id = warehouse.id
         if warehouse.manager:
             self.manager = warehouse.manager.id
             # related manager_user_id will be set by relational stored field automatically
             _logger.debug('Assigned manager %s to notification %s', warehouse.manager.id, self.id)
 
+    def _track_get_fields(self):
+        return self._filter_lightweight_tracking(super()._track_get_fields())
+
+    def write(self, vals):
+        previous = {rec.id: rec.status for rec in self} if 'status' in vals else None
+        res = super().write(vals)
+        if previous is not None:
+            self.env['part.status.transition'].sudo()._log_transitions(self, 'status', previous)
+            self._send_status_bus()
+        return res
+
+    def _get_status_bus_partners(self):
+        partners = super()._get_status_bus_partners()
+        return partners | self.supervisor_user_id.partner_id | self.manager_user_id.partner_id
+
+    def _get_transition_values(self):
+        self.ensure_one()
+        return {
+            'part_id': self.part_id.id,
+            'company_id': self.company_id.id,
+            'warehouse_id': self.warehouse_id.id,
+            'supervisor_id': self.supervisor_id.id,
+        }
+
     @api.depends('status', 'company_id.enable_direct_pickup')
     def _compute_show_pick_up_button(self):
         for rec in self:
@@ -151,7 +222,7 @@ class PartApprovalNotification(models.Model):
 
     def _get_product_from_task(self, task):
         return task.customer_product_id.product_id if task.customer_product_id else self.product_id
-
+    @instrumented('part.approval.notification.action_approve')
     def action_approve(self):
         for rec in self:
             if rec.company_id.enable_warehouse != 'internal_warehouse':
@@ -161,6 +232,10 @@ class PartApprovalNotification(models.Model):
             task = rec.task_id or rec
             supervisor = rec._check_supervisor_rights(task)
 
+            if not rec._lock_workflow() or rec.status != 'draft':
+                _logger.debug('Record %s already left draft; current status: %s', rec.id, rec.status)
+                continue
+
             rec.status = 'approved'
             if rec.part_id:
                 rec.part_id.status = 'approved'
@@ -179,6 +254,7 @@ class PartApprovalNotification(models.Model):
                 )
                 _logger.debug('Notified assignees %s for record %s', partner_ids, rec.id)
 
+    @instrumented('part.approval.notification.action_reject')
     def action_reject(self):
         for rec in self:
             if rec.company_id.enable_warehouse != 'internal_warehouse':
@@ -188,6 +264,10 @@ class PartApprovalNotification(models.Model):
             task = rec.task_id or rec
             rec._check_supervisor_rights(task)
 
+            if not rec._lock_workflow() or rec.status != 'draft':
+                _logger.debug('Record %s already left draft; current status: %s', rec.id, rec.status)
+                continue
+
             rec.status = 'rejected'
             if rec.part_id:
                 rec.part_id.status = 'rejected'
@@ -224,6 +304,7 @@ class PartApprovalNotification(models.Model):
                 warehouse = self.env['stock.warehouse'].search(['|', ('lot_stock_id', '=', parent.id), ('view_location_id', '=', parent.id)], limit=1)
         return warehouse
 
+    @instrumented('part.approval.notification.action_request_warehouse_manager')
     def action_request_warehouse_manager(self):
         for rec in self:
             if rec.company_id.enable_warehouse != 'internal_warehouse':
@@ -241,6 +322,12 @@ class PartApprovalNotification(models.Model):
             # supervisor permission
             rec._check_supervisor_rights(task)
 
+            if not rec._lock_workflow() or rec.status not in ('approved', 'customer_approved'):
+                _logger.debug('Record %s cannot be sent to the warehouse; current status: %s', rec.id, rec.status)
+                continue
+
+            if rec.warehouse_id != warehouse:
+                rec.warehouse_id = warehouse
             if rec.part_id:
                 rec.part_id.status = 'waiting_warehouse_manager'
             rec.status = 'waiting_warehouse_manager'
@@ -259,6 +346,7 @@ class PartApprovalNotification(models.Model):
                 subtype_xmlid='mail.mt_note',
             )
 
+    @instrumented('part.approval.notification.action_part_available')
     def action_part_available(self):
         for rec in self:
             if rec.company_id.enable_warehouse != 'internal_warehouse':
@@ -280,11 +368,12 @@ class PartApprovalNotification(models.Model):
             if not manager_user or self.env.user.id != manager_user.id:
                 raise AccessError(_('Only the Warehouse Manager (%s) can mark this part as available.') % (manager_employee.name if manager_employee else 'Not Assigned'))
 
-            if rec.status != 'waiting_warehouse_manager':
+            if not rec._lock_workflow() or rec.status != 'waiting_warehouse_manager':
                 _logger.debug('Record %s not in waiting_warehouse_manager; current status: %s', rec.id, rec.status)
                 continue
 
             rec.status = 'shipment'
+            rec.warehouse_id = rec.warehouse_id or warehouse
             if rec.part_id:
                 rec.part_id.status = 'shipment'
 
@@ -304,6 +393,73 @@ class PartApprovalNotification(models.Model):
                     email_layout_xmlid='mail.mail_notification_light',
                 )
 
+    @api.depends('move_ids.picking_id', 'move_ids.state')
+    def _compute_picking_id(self):
+        for rec in self:
+            rec.picking_id = rec.move_ids.filtered(lambda move: move.state != 'cancel')[:1].picking_id
+
+    @api.model
+    def _get_picking_domain(self):
+        """Domain of the available parts not yet in a transfer."""
+        return [
+            ('status', '=', 'shipment'),
+            ('part_id', '!=', False),
+            ('warehouse_id', '!=', False),
+            ('company_id.enable_warehouse', '=', 'internal_warehouse'),
+            ('picking_id', '=', False),
+        ]
+
+    @api.model
+    def _cron_create_pickings(self):
+        self.search(self._get_picking_domain(), order='id')._create_grouped_pickings()
+
+    def action_create_pickings(self):
+        pickings = self.filtered_domain(self._get_picking_domain())._create_grouped_pickings()
+        if not pickings:
+            raise UserError(_('None of the selected parts is available and waiting for a transfer.'))
+        action = self.env['ir.actions.actions']._for_xml_id('stock.action_picking_tree_all')
+        action['domain'] = [('id', 'in', pickings.ids)]
+        return action
+
+    def _create_grouped_pickings(self):
+        """Create one delivery per warehouse and customer, with one move per
+        part linked to its part and notification. Return the pickings."""
+        # a concurrent run is creating the transfers of the locked rows
+        notifications = self._lock_for_transition(skip_locked=True).filtered_domain(self._get_picking_domain())
+        if not notifications:
+            return self.env['stock.picking']
+        customer_location = self.env.ref('stock.stock_location_customers')
+        picking_vals = []
+        for (warehouse, partner), group in notifications.grouped(lambda n: (n.warehouse_id, n.partner_id)).items():
+            picking_type = warehouse.out_type_id
+            location = picking_type.default_location_src_id or warehouse.lot_stock_id
+            location_dest = picking_type.default_location_dest_id or customer_location
+            picking_vals.append({
+                'picking_type_id': picking_type.id,
+                'partner_id': partner.id,
+                'location_id': location.id,
+                'location_dest_id': location_dest.id,
+                'company_id': warehouse.company_id.id,
+                'origin': ', '.join(sorted(set(filter(None, group.mapped('sequence_fsm'))))),
+                'move_ids': [Command.create({
+                    'name': rec.part_name or rec.part_id.product_id.display_name,
+                    'product_id': rec.part_id.product_id.product_variant_id.id,
+                    'product_uom_qty': 1.0,
+                    'product_uom': rec.part_id.product_id.uom_id.id,
+                    'location_id': location.id,
+                    'location_dest_id': location_dest.id,
+                    'company_id': warehouse.company_id.id,
+                    'part_id': rec.part_id.id,
+                    'part_notification_id': rec.id,
+                }) for rec in group],
+            })
+        pickings = self.env['stock.picking'].create(picking_vals)
+        pickings.action_confirm()
+        pickings.action_assign()
+        _logger.info('Created %s transfers for %s parts', len(pickings), len(notifications))
+        return pickings
+
+    @instrumented('part.approval.notification.action_pick_up')
     def action_pick_up(self):
         for rec in self:
             if rec.company_id.enable_warehouse != 'internal_warehouse':
@@ -316,6 +472,9 @@ class PartApprovalNotification(models.Model):
             if self.env.user.id not in rec.user_ids.ids:
                 raise AccessError(_('Only assigned users can mark this part as picked up.'))
 
+            rec._lock_workflow()
+            if rec.status == 'pick_up':
+                continue
             if rec.status != 'shipment':
                 raise UserError(_('You can only mark parts as Pick Up when status is %s.') % _('Shipment'))
 
@@ -343,6 +502,7 @@ class PartApprovalNotification(models.Model):
                     subtype_xmlid='mail.mt_note',
                 )
 
+    @instrumented('part.approval.notification.action_redirect_stock')
     def action_redirect_stock(self):
         self.ensure_one()
         if self.env.company.enable_warehouse != 'internal_warehouse':
@@ -404,11 +564,13 @@ class PartApprovalNotification(models.Model):
 class PartCustomerApprovalNotification(models.Model):
     _name = 'part.customer.approval.notification'
     _description = 'Customer Part Approval Notification'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'part.workflow.mixin']
+    _workflow_status_fields = ('status', 'stage')
+    _workflow_company_field = 'task_id.company_id'
 
     task_id = fields.Many2one('project.task', string='Call Name', readonly=True, store=True)
     product_id = fields.Many2one('product.product', string='Product', readonly=True, store=True)
-    part_id = fields.Many2one('project.task.part', string='Part', readonly=True, store=True)
+    part_id = fields.Many2one('project.task.part', string='Part', readonly=True, store=True, index=True)
     part_name = fields.Char(string='Part Name', readonly=True, store=True)
     coverage = fields.Selection([
         ('foc', 'FOC'),
@@ -422,7 +584,10 @@ class PartCustomerApprovalNotification(models.Model):
         ('partially_paid','Partially Paid'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
-    ], default='pending', string='Stage', tracking=True, readonly=True, store=True)
+    ], default='pending', string='Stage', tracking=True, readonly=True, store=True, index=True)
+    # lowercase text searched by the portal, trigram indexed
+    search_document = fields.Char(string='Search Document', compute='_compute_search_document',
+                                  store=True, index='trigram')
 
     status = fields.Selection([
         ('draft', 'Draft'),
@@ -436,27 +601,184 @@ class PartCustomerApprovalNotification(models.Model):
         ('rejected', 'Rejected'),
     ], string='Status', default='draft', tracking=True)
 
+    @api.depends('part_name', 'product_id.name', 'sequence_fsm', 'task_id.user_ids.name', 'stage')
+    def _compute_search_document(self):
+        for rec in self:
+            rec.search_document = ' '.join(filter(None, [
+                rec.part_name,
+                rec.product_id.name,
+                rec.sequence_fsm,
+                *rec.task_id.user_ids.mapped('name'),
+                rec.stage,
+            ])).lower() or False
+
+    @api.model
+    def _search_portal(self, domain, search='', order=None):
+        """Return the records of ``domain`` whose search document contains
+        ``search``, best matches first when ``order`` is not given."""
+        if not search:
+            return self.search(domain, order=order)
+        search = search.strip().lower()
+        query = self._search(domain + [('search_document', 'ilike', search)], order=order or 'id desc')
+        if not order and self.env.registry.has_trigram:
+            query.order = SQL(
+                "word_similarity(%s, %s) DESC, %s DESC",
+                search, SQL.identifier(query.table, 'search_document'), SQL.identifier(query.table, 'id'),
+            )
+        return self.browse(query)
+
+    def init(self):
+        super().init()
+        self._create_sync_index()
+
+    def unlink(self):
+        self.env['part.sync.tombstone']._record(self)
+        return super().unlink()
+
+    def _track_get_fields(self):
+        return self._filter_lightweight_tracking(super()._track_get_fields())
+
+    def write(self, vals):
+        tracked = [fname for fname in ('stage', 'status') if fname in vals]
+        previous = {fname: {rec.id: rec[fname] for rec in self} for fname in tracked}
+        res = super().write(vals)
+        for fname in tracked:
+            self.env['part.status.transition'].sudo()._log_transitions(self, fname, previous[fname])
+        if tracked:
+            self._send_status_bus()
+        return res
+
+    def _get_transition_values(self):
+        self.ensure_one()
+        return {
+            'part_id': self.part_id.id,
+            'company_id': self.task_id.company_id.id,
+            'warehouse_id': self.part_id.approval_notification_id.warehouse_id.id,
+            'supervisor_id': self.task_id.department_id.manager_id.id,
+        }
+
+    @instrumented('part.customer.approval.notification.action_approve')
     def action_approve(self):
         for rec in self:
+            if not rec._lock_workflow() or rec.stage not in ('pending', 'partially_paid'):
+                continue
             rec.stage = 'approved'
 
             # Update the related part's stage to 'approved'
             if rec.part_id:
                 rec.part_id.status = 'customer_approved'
 
+    @instrumented('part.customer.approval.notification.action_reject')
     def action_reject(self):
         for rec in self:
+            if not rec._lock_workflow() or rec.stage != 'pending':
+                continue
             rec.stage = 'rejected'
 
             # Update the related part's stage back to 'draft' when rejected
             if rec.part_id:
                 rec.part_id.status = 'rejected'
 
+    def _get_quotation(self):
+        self.ensure_one()
+        return self.env['sale.order'].sudo().search([
+            ('ticket_id', '=', self.task_id.id),
+            ('part_id', '=', self.part_id.id),
+        ], limit=1)
+
+    def _customer_approve(self):
+        """Approve the request on behalf of the customer of its task.
+
+        Return ``(result, quotation)``, result being 'approved', 'payment_required'
+        when the part has to be paid on its quotation first, or 'ignored'
+        when the request is no longer pending.
+        """
+        self.ensure_one()
+        # lock before checking the stage, a payment may be approving it
+        if not self._lock_workflow() or self.stage != 'pending' or not self.part_name:
+            return 'ignored', self.env['sale.order']
+        product_template = self.env['product.template'].sudo().search([
+            ('name', '=', self.part_name),
+            ('is_part', '=', True)
+        ], limit=1)
+        quotation = self._get_quotation()
+        if not product_template:
+            return 'ignored', quotation
+        if product_template.payment_required_first:
+            return 'payment_required', quotation
+
+        self.action_approve()
+
+        # No payment required notify supervisor
+        task = self.task_id
+        supervisor = task.department_id.manager_id if task.department_id else False
+        partner_ids = task.user_ids.mapped('partner_id').ids
+        if supervisor and supervisor.user_id and supervisor.user_id.partner_id:
+            partner_ids.append(supervisor.user_id.partner_id.id)
+        if supervisor:
+            message = _(
+                "Customer %s has approved a parts request for part '%s'."
+            ) % (task.partner_id.name, self.part_name)
+            task.message_post(
+                body=message,
+                subject="Customer Approved",
+                partner_ids=partner_ids,
+                message_type='notification',
+                subtype_xmlid='mail.mt_comment',
+            )
+        return 'approved', quotation
+
+    def _customer_reject(self):
+        """Reject the request on behalf of the customer of its task and cancel its quotation.
+
+        Return False when the request is no longer pending.
+        """
+        self.ensure_one()
+        if not self._lock_workflow() or self.stage != 'pending':
+            return False
+
+        self.action_reject()
+
+        task = self.task_id
+        part = self.part_id
+
+        # Notify task assignees
+        if task and task.user_ids:
+            message = _(
+                "Customer %s has rejected a parts request for part '%s'."
+            ) % (task.partner_id.name, self.part_name)
+            task.message_notify(
+                body=message,
+                subject="Customer Rejected",
+                partner_ids=task.user_ids.mapped('partner_id').ids,
+                subtype_xmlid='mail.mt_note',
+            )
+            task.message_post(
+                body=message,
+                subject="Customer Rejected",
+                subtype_xmlid='mail.mt_note',
+            )
+
+        # Cancel quotation
+        quotation = self._get_quotation()
+        if quotation and quotation.state not in ('cancel', 'done'):
+            quotation.action_cancel()
+            quotation.write({'state': 'cancel'})
+            if part:
+                part.sudo().write({'has_cancelled_quotation': True})
+        return True
+
     is_fully_paid = fields.Boolean(string='Fully Paid')
 
+    _sql_constraints = [
+        ('task_part_uniq', 'unique(task_id, part_id)',
+         'A customer approval request already exists for this part of the task.'),
+    ]
+
 class PaymentTransactions(models.Model):
     _inherit = 'payment.transaction'
 
+    @instrumented('payment.transaction._create_invoice_from_payment')
     def _create_invoice_from_payment(self, tx):
         """Extend parent logic to also update part/customer approval and notify ticket assignees."""
 
@@ -469,15 +791,12 @@ class PaymentTransactions(models.Model):
             if not ticket or not part:
                 continue
 
-            # Find related customer approval notification
-            notification = self.env['part.customer.approval.notification'].sudo().search([
-                ('task_id', '=', ticket.id),
-                ('part_id', '=', part.id)
-            ], limit=1)
-            parts_notification = self.env['part.approval.notification'].sudo().search([
-                ('task_id', '=', ticket.id),
-                ('part_id', '=', part.id)
-            ], limit=1)
+            # Lock before reading the state, the customer may be acting on it
+            part._lock_workflow()
+            notification = part.sudo().customer_approval_notification_id
+            parts_notification = part.sudo().approval_notification_id
+            if notification.is_fully_paid:
+                continue
 
             part_name = (
                 part.product_id.display_name
@@ -503,7 +822,7 @@ class PaymentTransactions(models.Model):
 
                 # === CASE 1: Partial Payment ===
                 if inv.amount_residual > 0:
-                    if notification:
+                    if notification and notification.stage in ('pending', 'partially_paid'):
                         notification.stage = 'partially_paid'
                         # don't update part.status yet
 
@@ -1,18 +1,30 @@
 from datetime import date
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, AccessError
 import logging
 
+from ..tools.profiling import instrumented
+
 _logger = logging.getLogger(__name__)
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
     ticket_id = fields.Many2one('project.task', string='Related Ticket', readonly=True, ondelete='set null')
-    part_id = fields.Many2one('project.task.part', string="Related Part", ondelete='cascade')
+    part_id = fields.Many2one('project.task.part', string="Related Part", ondelete='cascade', index='btree_not_null')
     is_part_quotation = fields.Boolean(string="Is Part Quotation", default=False)
 
+    def init(self):
+        super().init()
+        # quotations are looked up by (ticket_id, part_id) from the portal
+        # routes and payment hooks; orders duplicated from the backend keep
+        # their part, so this is an index and not a unique constraint
+        tools.create_index(
+            self._cr, 'sale_order_ticket_id_part_id_index',
+            self._table, ['ticket_id', 'part_id'],
+        )
+
 
     def write(self, vals):
         res = super().write(vals)
@@ -30,12 +42,10 @@ class SaleOrder(models.Model):
         if 'state' in vals and vals['state'] == 'sent':
             for order in self.filtered(lambda o: o.part_id):
                 part = order.part_id
+                part._lock_workflow()
                 task = part.task_id
                 part_name = part.product_id.display_name if part.product_id else (part.description or "Unknown Part")
-                notif = self.env['part.customer.approval.notification'].sudo().search([
-                    ('part_id', '=', part.id),
-                    ('task_id', '=', task.id),
-                ], limit=1)
+                notif = part.sudo().customer_approval_notification_id
 
                 if notif:
                     notif.sudo().write({
@@ -77,6 +87,68 @@ class SaleOrder(models.Model):
 
         return res
 
+    @instrumented('sale.order._handle_part_invoice_payment')
+    def _handle_part_invoice_payment(self, invoice):
+        """Update the part workflow after a payment on an invoice of this part quotation."""
+        self.ensure_one()
+        task = self.ticket_id
+        part = self.part_id
+        parts_notification = part.approval_notification_id
+
+        part_name = (
+            part.product_id.display_name
+            if part and part.product_id
+            else part.part_name or _('Unnamed Part')
+        )
+
+        if not task:
+            return
+
+        # Notify payment info
+        paid_amount = invoice.amount_total - invoice.amount_residual
+        task.message_post(
+            # body=f"Customer paid {paid_amount} / {invoice.amount_total} for {invoice.name}.",
+            body=f"Customer has fully paid for ticket {task.name}. Part {part_name} is now approved.",
+            subject="Customer Payment Update",
+            subtype_xmlid='mail.mt_note',
+        )
+
+        # Handle full or partial
+        if invoice.amount_residual == 0:
+            part._lock_workflow()
+            notif = part.customer_approval_notification_id
+            if notif.is_fully_paid:
+                return
+
+            if notif:
+                notif.stage = 'approved'
+                # sale_order.part_id.status = 'customer_approved'
+                notif.is_fully_paid = True
+                part.status = 'customer_approved'
+
+            # Notify users
+            partner_ids = task.user_ids.mapped('partner_id').ids
+            if task.department_id.manager_id and task.department_id.manager_id.user_id:
+                partner_ids.append(task.department_id.manager_id.user_id.partner_id.id)
+
+            parts_notification.message_notify(
+                body=f"Customer has fully paid for ticket {task.name}. Part {part_name} is now approved.",
+                subject="Full Payment Completed",
+                partner_ids=partner_ids,
+                subtype_xmlid='mail.mt_note',
+            )
+            parts_notification.message_post(
+                body=f"Customer has fully paid for ticket {task.name}. Part {part_name} is now approved.",
+                subject="Full Payment Completed",
+                subtype_xmlid='mail.mt_note',
+            )
+        else:
+            task.message_post(
+                body=f"Partial payment received for {invoice.name}. Remaining {invoice.amount_residual}.",
+                subject="Partial Payment",
+                subtype_xmlid='mail.mt_note',
+            )
+
 class ProjectTask(models.Model):
     _inherit = 'project.task'
 
@@ -114,18 +186,42 @@ class ProjectTask(models.Model):
         if 'stage_id' in vals:
             new_stage = self.env['project.task.type'].browse(vals['stage_id'])
             self._check_part_status_before_stage_change(new_stage.name)
-        return super(ProjectTask, self).write(vals)
+        audiences = None
+        if 'user_ids' in vals or 'partner_id' in vals:
+            audiences = {task: task._get_sync_partners() for task in self}
+        res = super(ProjectTask, self).write(vals)
+        if audiences:
+            # the users taken off a task drop its parts at their next sync
+            for task, partners in audiences.items():
+                removed = partners - task._get_sync_partners()
+                for records in task._get_sync_records() if removed else ():
+                    self.env['part.sync.tombstone']._record(records, partners=removed)
+        return res
+
+    def _get_sync_partners(self):
+        """Partners of the users the parts of the tasks are synced to, see ``api_sync``."""
+        return self.partner_id | self.user_ids.partner_id
+
+    def _get_sync_records(self):
+        """Parts, approval and customer notifications of the tasks, as synced by ``api_sync``."""
+        tasks = self.sudo()
+        return (
+            tasks.part_ids,
+            tasks.env['part.approval.notification'].search([('task_id', 'in', tasks.ids)]),
+            tasks.env['part.customer.approval.notification'].search([('task_id', 'in', tasks.ids)]),
+        )
 
 
     def unlink(self):
-        for task in self:
-            self.env['part.approval.notification'].search([('task_id', '=', task.id)]).unlink()
-            self.env['part.customer.approval.notification'].search([('task_id', '=', task.id)]).unlink()
-            quotations = self.env['sale.order'].sudo().search([
-                ('ticket_id', '=', task.id),
-            ])
-            if quotations:
-                quotations.sudo().unlink()
+        # parts may be deleted in cascade by the database, keep their tombstones
+        self.env['part.sync.tombstone']._record(self.sudo().part_ids)
+        self.env['part.approval.notification'].search([('task_id', 'in', self.ids)]).unlink()
+        self.env['part.customer.approval.notification'].search([('task_id', 'in', self.ids)]).unlink()
+        quotations = self.env['sale.order'].sudo().search([
+            ('ticket_id', 'in', self.ids),
+        ])
+        if quotations:
+            quotations.unlink()
         return super(ProjectTask, self).unlink()
 
 
@@ -241,7 +337,8 @@ class PartServiceWizard(models.TransientModel):
 
 
 class ProjectTaskPart(models.Model):
-    _inherit = 'project.task.part'
+    _inherit = ['project.task.part', 'part.workflow.mixin']
+    _workflow_company_field = 'task_id.company_id'
 
     coverage = fields.Selection([
         ('foc', 'FOC'),
@@ -255,6 +352,16 @@ class ProjectTaskPart(models.Model):
         readonly=False
     )
     sale_order_ids = fields.One2many('sale.order', 'part_id', string="Sale Orders")
+    approval_notification_ids = fields.One2many(
+        'part.approval.notification', 'part_id', string="Approval Notifications")
+    customer_approval_notification_ids = fields.One2many(
+        'part.customer.approval.notification', 'part_id', string="Customer Approval Notifications")
+    approval_notification_id = fields.Many2one(
+        'part.approval.notification', string="Approval Notification",
+        compute='_compute_current_notifications', store=True, index='btree_not_null')
+    customer_approval_notification_id = fields.Many2one(
+        'part.customer.approval.notification', string="Customer Approval Notification",
+        compute='_compute_current_notifications', store=True, index='btree_not_null')
 
     status = fields.Selection([
         ('draft', 'Draft'),
@@ -274,16 +381,43 @@ class ProjectTaskPart(models.Model):
         help='Indicates if customer approval has been requested'
     )
 
+    def init(self):
+        super().init()
+        self._create_sync_index()
+        # parts of a task by status: portal home counters and receive checks
+        tools.create_index(self._cr, 'project_task_part_task_id_status_index',
+                           self._table, ['task_id', 'status'])
+
+    @api.depends('approval_notification_ids', 'customer_approval_notification_ids')
+    def _compute_current_notifications(self):
+        for part in self:
+            part.approval_notification_id = part.approval_notification_ids[:1]
+            part.customer_approval_notification_id = part.customer_approval_notification_ids[:1]
+
+    def _track_get_fields(self):
+        return self._filter_lightweight_tracking(super()._track_get_fields())
+
     @api.model
     def write(self, vals):
+        previous = {part.id: part.status for part in self} if 'status' in vals else None
         res = super().write(vals)
-        for part in self:
-            if 'status' in vals:
-                notif = self.env['part.approval.notification'].sudo().search([('part_id', '=', part.id)], limit=1)
-                if notif:
-                    notif.status = vals['status']
+        if previous is not None:
+            self.env['part.status.transition'].sudo()._log_transitions(self, 'status', previous)
+            self._send_status_bus()
+            notifications = self.sudo().approval_notification_id
+            if notifications:
+                notifications.write({'status': vals['status']})
         return res
 
+    def _get_transition_values(self):
+        self.ensure_one()
+        return {
+            'part_id': self.id,
+            'company_id': self.task_id.company_id.id,
+            'warehouse_id': self.approval_notification_id.warehouse_id.id,
+            'supervisor_id': self.task_id.department_id.manager_id.id,
+        }
+
     @api.depends('product_id', 'coverage')
     def _compute_amount(self):
         for rec in self:
@@ -356,19 +490,72 @@ class ProjectTaskPart(models.Model):
             rec.coverage = coverage
 
     def unlink(self):
-        for part in self:
-            self.env['part.approval.notification'].search([('part_id', '=', part.id)]).unlink()
-            self.env['part.customer.approval.notification'].search([('part_id', '=', part.id)]).unlink()
-        quotations = self.env['sale.order'].sudo().search([
-            ('part_id', '=', part.id)
-        ])
+        self.env['part.sync.tombstone']._record(self)
+        self.approval_notification_ids.unlink()
+        self.customer_approval_notification_ids.unlink()
+        quotations = self.sudo().sale_order_ids
         if quotations:
-            quotations.sudo().unlink()
+            quotations.unlink()
 
         return super(ProjectTaskPart, self).unlink()
 
+    def _lock_workflow(self, skip_locked=False):
+        """Lock the parts and their notifications before a status transition.
+
+        Rows are always locked in the same order (parts, approval
+        notifications, customer notifications) so that concurrent transitions
+        on the same part never deadlock, see ``_lock_for_transition`` for
+        ``skip_locked``. Return the locked parts.
+        """
+        parts = self.sudo()._lock_for_transition(skip_locked=skip_locked)
+        parts.approval_notification_ids._lock_for_transition()
+        parts.customer_approval_notification_ids._lock_for_transition()
+        return self.browse(parts.ids)
+
+    @instrumented('project.task.part._action_customer_receive')
+    def _action_customer_receive(self):
+        """Mark the parts as received by the customer in bulk.
+
+        Parts already received are skipped so that a retried request is a
+        no-op. One chatter message and one notification are sent per task.
+        Return the parts that were received by this call.
+        """
+        # parts being received by a concurrent request are left to it
+        parts = self._lock_workflow(skip_locked=True).filtered(lambda p: p.status != 'received')
+        if not parts:
+            return parts
+
+        # single write, the part write syncs the approval notifications
+        parts.write({'status': 'received'})
+
+        for task, task_parts in parts.grouped('task_id').items():
+            if not task:
+                continue
+            part_names = ', '.join(
+                part.product_id.display_name or _("Unnamed Part") for part in task_parts)
+            message = _("Customer %s has received the parts: %s.") % (task.partner_id.name, part_names)
+            task.message_post(body=message, subtype_xmlid='mail.mt_note')
+
+            partners = task.user_ids.partner_id
+            if task.department_id.manager_id.user_id:
+                partners |= task.department_id.manager_id.user_id.partner_id
+            if partners:
+                task.message_notify(
+                    subject=_("Customer Received - %s") % task.name,
+                    body=message,
+                    partner_ids=partners.ids,
+                    subtype_xmlid='mail.mt_note',
+                )
+        return parts
+
+    @instrumented('project.task.part.action_parts_request')
     def action_parts_request(self):
-        """Send notification only to the department manager using message_post"""
+        """Send notification only to the department manager using message_post
+
+        The notifications of all the parts are created in one batch.
+        """
+        notification_vals = []
+        messages = []
         for part in self:
             if not part.part_service_type:
                 raise UserError(_("Please select the Part Service Type before requesting."))
@@ -395,8 +582,12 @@ class ProjectTaskPart(models.Model):
             if supervisor.company_id != task.company_id:
                 raise AccessError(_(f"You Can not send request because supervisor ({supervisor.company_id.name}) and task ({task.company_id.name}) belong to different companies."))
 
-            # Create notification record in part.approval.notification
-            notification = self.env['part.approval.notification'].create({
+            # (task_id, part_id) is unique, never create a second request, nor
+            # a new one once the closed request has been archived
+            if part.sudo().approval_notification_id or part.status in ('received', 'rejected'):
+                continue
+
+            notification_vals.append({
                 'task_id': task.id,
                 'part_id': part.id,
                 'part_name': part_name,
@@ -408,16 +599,24 @@ class ProjectTaskPart(models.Model):
                 'status': 'draft',
                 'company_id': task.company_id.id,
             })
+            messages.append((
+                task, supervisor,
+                f"The part '{part_name}' of product '{product_name}' is send approval for Task '{task.name}'.",
+            ))
+
+        # Create notification records in part.approval.notification
+        notifications = self.env['part.approval.notification'].create(notification_vals)
 
-            # Post message to task chatter and notify only the supervisor
+        # Post message to task chatter and notify only the supervisor
+        for notification, (task, supervisor, body) in zip(notifications, messages):
             notification.message_notify(
-                body=f"The part '{part_name}' of product '{product_name}' is send approval for Task '{task.name}'.",
+                body=body,
                 subject=_("Part Approval Request"),
                 partner_ids=[supervisor.user_id.partner_id.id],
                 subtype_xmlid='mail.mt_note',
             )
             task.message_post(
-                body=f"The part '{part_name}' of product '{product_name}' is send approval for Task '{task.name}'.",
+                body=body,
                 subtype_xmlid = 'mail.mt_note',
             )
 
@@ -434,6 +633,7 @@ class ProjectTaskPart(models.Model):
             part.has_cancelled_quotation = quotation.state == 'cancel' if quotation else False
 
 
+    @instrumented('project.task.part.action_create_quotation')
     def action_create_quotation(self):
         for part in self:
             part.approval_requested = True
@@ -483,6 +683,7 @@ class ProjectTaskPart(models.Model):
             'target': 'current',
         }
 
+    @instrumented('project.task.part.action_open_canceled_quotation')
     def action_open_canceled_quotation(self):
         for part in self:
             part.approval_requested = True
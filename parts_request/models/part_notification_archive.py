@@ -0,0 +1,139 @@
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import html2plaintext, split_every
+
+_logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 500
+
+# domain of the notifications whose workflow is over, per archived model
+ARCHIVABLE_DOMAINS = {
+    'part.approval.notification': [
+        ('status', 'in', ('received', 'rejected')),
+        '|', ('part_id', '=', False), ('part_id.status', 'in', ('received', 'rejected')),
+    ],
+    'part.customer.approval.notification': [
+        '|', ('stage', '=', 'rejected'), ('is_fully_paid', '=', True),
+        '|', ('part_id', '=', False), ('part_id.status', 'in', ('received', 'rejected')),
+    ],
+}
+
+
+class PartNotificationArchive(models.Model):
+    """Compact copy of the closed approval notifications, chatter included.
+
+    ``_cron_archive_notifications`` moves the notifications closed for more
+    than ``parts_request.archive_after_months`` months (12 by default, 0
+    disables it) here, and deletes them with their followers, messages and
+    activities.
+    """
+    _name = 'part.notification.archive'
+    _description = 'Archived Part Notification'
+    _order = 'close_date desc, id desc'
+    _rec_name = 'sequence_fsm'
+    _log_access = False
+
+    res_model = fields.Selection([
+        ('part.approval.notification', 'Approval Notification'),
+        ('part.customer.approval.notification', 'Customer Approval Notification'),
+    ], string='Document Model', required=True, readonly=True)
+    res_id = fields.Integer(string='Original ID', required=True, readonly=True)
+    task_id = fields.Many2one('project.task', string='Call Name', readonly=True, ondelete='set null', index='btree_not_null')
+    part_id = fields.Many2one('project.task.part', string='Part', readonly=True, ondelete='set null', index='btree_not_null')
+    product_id = fields.Many2one('product.product', string='Product', readonly=True, ondelete='set null')
+    partner_id = fields.Many2one('res.partner', string='Customer', readonly=True, ondelete='set null')
+    supervisor_id = fields.Many2one('hr.employee', string='Supervisor', readonly=True, ondelete='set null')
+    company_id = fields.Many2one('res.company', string='Company', readonly=True, ondelete='set null')
+    part_name = fields.Char(string='Part Name', readonly=True)
+    sequence_fsm = fields.Char(string='Ticket Number', readonly=True, index=True)
+    coverage = fields.Selection([('foc', 'FOC'), ('chargeable', 'Chargeable')], string='Coverage', readonly=True)
+    status = fields.Char(string='Status', readonly=True)
+    stage = fields.Char(string='Stage', readonly=True)
+    is_fully_paid = fields.Boolean(string='Fully Paid', readonly=True)
+    request_date = fields.Datetime(string='Requested On', readonly=True)
+    close_date = fields.Datetime(string='Closed On', readonly=True, index=True)
+    archive_date = fields.Datetime(string='Archived On', readonly=True)
+    chatter = fields.Text(string='Chatter', readonly=True)
+
+    @api.model
+    def _cron_archive_notifications(self, batch_size=ARCHIVE_BATCH_SIZE):
+        months = int(self.env['ir.config_parameter'].sudo().get_param('parts_request.archive_after_months', 12))
+        if months <= 0:
+            return
+        cutoff = fields.Datetime.now() - timedelta(days=30 * months)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for model_name, domain in ARCHIVABLE_DOMAINS.items():
+            Model = self.env[model_name].sudo().with_context(active_test=False)
+            while True:
+                records = Model.search(domain + [('write_date', '<', cutoff)], limit=batch_size, order='id')
+                if not records:
+                    break
+                self._archive_records(records)
+                if auto_commit:
+                    self.env.cr.commit()
+                _logger.info('Archived %s closed %s records', len(records), model_name)
+                if len(records) < batch_size:
+                    break
+
+    @api.model
+    def _archive_records(self, records):
+        """Copy ``records`` and their chatter into the archive, then delete them."""
+        chatter = self._get_chatter_text(records)
+        now = fields.Datetime.now()
+        is_customer = records._name == 'part.customer.approval.notification'
+        self.sudo().create([{
+            'res_model': records._name,
+            'res_id': rec.id,
+            'task_id': rec.task_id.id,
+            'part_id': rec.part_id.id,
+            'product_id': rec.product_id.id,
+            'partner_id': rec.task_id.partner_id.id if is_customer else rec.partner_id.id,
+            'supervisor_id': rec.task_id.department_id.manager_id.id if is_customer else rec.supervisor_id.id,
+            'company_id': rec.task_id.company_id.id if is_customer else rec.company_id.id,
+            'part_name': rec.part_name,
+            'sequence_fsm': rec.sequence_fsm,
+            'coverage': rec.coverage,
+            'status': rec.status,
+            'stage': rec.stage if is_customer else False,
+            'is_fully_paid': rec.is_fully_paid if is_customer else False,
+            'request_date': rec.create_date,
+            'close_date': rec.write_date,
+            'archive_date': now,
+            'chatter': chatter.get(rec.id),
+        } for rec in records])
+
+        # the messages go through the ORM, which deletes their attachments and
+        # filestore files; the other mail.thread data is not linked by foreign
+        # keys and has no files
+        messages = self.env['mail.message'].sudo().search(
+            [('model', '=', records._name), ('res_id', 'in', records.ids)], order='id')
+        for batch in split_every(ARCHIVE_BATCH_SIZE, messages.ids, messages.browse):
+            batch.unlink()
+        ids = tuple(records.ids)
+        self.env.cr.execute("DELETE FROM mail_followers WHERE res_model = %s AND res_id IN %s", (records._name, ids))
+        self.env.cr.execute("DELETE FROM mail_activity WHERE res_model = %s AND res_id IN %s", (records._name, ids))
+        self.env.invalidate_all()
+        records.unlink()
+
+    @api.model
+    def _get_chatter_text(self, records):
+        """Return the chatter of ``records`` as plain text, one line per message."""
+        self.env.cr.execute("""
+            SELECT msg.res_id, msg.date, COALESCE(author.name, msg.email_from, ''), msg.body,
+                   (SELECT string_agg(concat_ws(' -> ', tracking.old_value_char, tracking.new_value_char), ', ')
+                      FROM mail_tracking_value tracking
+                     WHERE tracking.mail_message_id = msg.id)
+              FROM mail_message msg
+         LEFT JOIN res_partner author ON author.id = msg.author_id
+             WHERE msg.model = %s AND msg.res_id IN %s
+          ORDER BY msg.res_id, msg.date, msg.id
+        """, (records._name, tuple(records.ids)))
+        lines = {}
+        for res_id, date, author, body, tracking in self.env.cr.fetchall():
+            text = ' '.join(filter(None, [html2plaintext(body or '').strip(), tracking]))
+            if text:
+                lines.setdefault(res_id, []).append(f'{fields.Datetime.to_string(date)} {author}: {text}')
+        return {res_id: '\n'.join(res_lines) for res_id, res_lines in lines.items()}
@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+
+from ..tools.profiling import HISTOGRAM_BOUNDS, histogram_field_names
+
+
+class PartPerformanceHistogram(models.AbstractModel):
+    _name = 'part.performance.histogram'
+    _description = 'Parts Performance Latency Histogram'
+
+    call_count = fields.Integer(string='Calls', readonly=True)
+    max_time = fields.Float(string='Max Time (s)', digits=(16, 4), readonly=True)
+    p50_time = fields.Float(string='p50 (ms)', compute='_compute_percentiles')
+    p95_time = fields.Float(string='p95 (ms)', compute='_compute_percentiles')
+    p99_time = fields.Float(string='p99 (ms)', compute='_compute_percentiles')
+
+    # one counter per latency bucket, see HISTOGRAM_BOUNDS
+    hist_10ms = fields.Integer(string='<= 10 ms', readonly=True)
+    hist_25ms = fields.Integer(string='<= 25 ms', readonly=True)
+    hist_50ms = fields.Integer(string='<= 50 ms', readonly=True)
+    hist_100ms = fields.Integer(string='<= 100 ms', readonly=True)
+    hist_250ms = fields.Integer(string='<= 250 ms', readonly=True)
+    hist_500ms = fields.Integer(string='<= 500 ms', readonly=True)
+    hist_1000ms = fields.Integer(string='<= 1000 ms', readonly=True)
+    hist_2500ms = fields.Integer(string='<= 2500 ms', readonly=True)
+    hist_5000ms = fields.Integer(string='<= 5000 ms', readonly=True)
+    hist_10000ms = fields.Integer(string='<= 10000 ms', readonly=True)
+    hist_inf = fields.Integer(string='> 10000 ms', readonly=True)
+
+    def _percentile(self, ratio):
+        """Estimate a latency percentile (ms) as the upper bound of the histogram bucket reaching it."""
+        self.ensure_one()
+        if not self.call_count:
+            return 0.0
+        threshold = ratio * self.call_count
+        cumulated = 0
+        for bound, name in zip(HISTOGRAM_BOUNDS, histogram_field_names()):
+            cumulated += self[name]
+            if cumulated >= threshold:
+                return float(bound)
+        return self.max_time * 1000
+
+    @api.depends('call_count', 'max_time', *histogram_field_names())
+    def _compute_percentiles(self):
+        for rec in self:
+            rec.p50_time = rec._percentile(0.50)
+            rec.p95_time = rec._percentile(0.95)
+            rec.p99_time = rec._percentile(0.99)
+
+
+class PartPerformanceMetric(models.Model):
+    """Per-minute aggregate of the instrumented parts actions, written in SQL by
+    ``tools.profiling.flush_samples``."""
+    _name = 'part.performance.metric'
+    _description = 'Parts Performance Metric'
+    _inherit = ['part.performance.histogram']
+    _order = 'bucket desc, action'
+    _log_access = False
+
+    action = fields.Char(string='Action', required=True, readonly=True)
+    bucket = fields.Datetime(string='Minute', required=True, readonly=True, index=True)
+    total_time = fields.Float(string='Total Time (s)', digits=(16, 4), readonly=True)
+    total_queries = fields.Integer(string='Total Queries', readonly=True)
+    total_sql_time = fields.Float(string='Total SQL Time (s)', digits=(16, 4), readonly=True)
+    total_records = fields.Integer(string='Total Records', readonly=True)
+
+    _sql_constraints = [
+        ('action_bucket_uniq', 'unique(action, bucket)', 'Only one metric per action and minute.'),
+    ]
+
+    @api.autovacuum
+    def _gc_old_metrics(self):
+        retention_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'parts_request.metrics_retention_days', 30))
+        self.env.cr.execute(
+            "DELETE FROM part_performance_metric WHERE bucket < %s",
+            (fields.Datetime.now() - timedelta(days=retention_days),),
+        )
+
+
+class PartPerformanceReport(models.Model):
+    _name = 'part.performance.report'
+    _description = 'Parts Performance Report'
+    _inherit = ['part.performance.histogram']
+    _auto = False
+    _order = 'date desc, action'
+
+    action = fields.Char(string='Action', readonly=True)
+    date = fields.Date(string='Date', readonly=True)
+    avg_time = fields.Float(string='Avg Time (ms)', readonly=True, group_operator='avg')
+    avg_queries = fields.Float(string='Avg Queries', readonly=True, group_operator='avg')
+    avg_sql_time = fields.Float(string='Avg SQL Time (ms)', readonly=True, group_operator='avg')
+    avg_records = fields.Float(string='Avg Records', readonly=True, group_operator='avg')
+
+    def init(self):
+        histogram = ', '.join(f'SUM({name}) AS {name}' for name in histogram_field_names())
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT MIN(id) AS id,
+                       action,
+                       bucket::date AS date,
+                       SUM(call_count) AS call_count,
+                       MAX(max_time) AS max_time,
+                       SUM(total_time) * 1000 / NULLIF(SUM(call_count), 0) AS avg_time,
+                       SUM(total_queries)::float / NULLIF(SUM(call_count), 0) AS avg_queries,
+                       SUM(total_sql_time) * 1000 / NULLIF(SUM(call_count), 0) AS avg_sql_time,
+                       SUM(total_records)::float / NULLIF(SUM(call_count), 0) AS avg_records,
+                       {histogram}
+                  FROM part_performance_metric
+              GROUP BY action, bucket::date
+            )
+        """)
@@ -0,0 +1,74 @@
+from datetime import datetime, time, timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+from ..tools.export import EXPORT_QUERIES, build_export_query, selection_formatter
+
+
+class PartRequestExport(models.TransientModel):
+    """Export of the parts request histories with their quotation and invoice amounts.
+
+    The file is streamed by ``/parts_request/export/<id>`` from a server side
+    cursor, whatever the number of rows.
+    """
+    _name = 'part.request.export'
+    _description = 'Parts Request Export'
+
+    res_model = fields.Selection([
+        ('part.approval.notification', 'Approval Notifications'),
+        ('part.customer.approval.notification', 'Customer Approvals'),
+    ], string='Export', required=True, default='part.approval.notification')
+    date_from = fields.Date(string='Requested From')
+    date_to = fields.Date(string='Requested To')
+    company_ids = fields.Many2many('res.company', string='Companies', required=True,
+                                   default=lambda self: self.env.companies)
+    file_format = fields.Selection([
+        ('xlsx', 'Excel (XLSX)'),
+        ('csv', 'CSV'),
+    ], string='Format', required=True, default='xlsx')
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for wizard in self:
+            if wizard.date_from and wizard.date_to and wizard.date_from > wizard.date_to:
+                raise ValidationError(_("The start date must be before the end date."))
+
+    def action_export(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/parts_request/export/{self.id}',
+            'target': 'self',
+        }
+
+    def _get_export_filename(self):
+        self.ensure_one()
+        name = 'parts_approvals' if self.res_model == 'part.approval.notification' else 'parts_customer_approvals'
+        return f'{name}_{fields.Date.context_today(self)}.{self.file_format}'
+
+    def _get_export_query(self):
+        """Return ``(header, query, params)`` of the rows to export, restricted
+        to the companies of the wizard the user is allowed in."""
+        self.ensure_one()
+        companies = self.company_ids & self.env.user.company_ids
+        return build_export_query(
+            self.res_model,
+            date_from=self.date_from and datetime.combine(self.date_from, time.min),
+            date_to=self.date_to and datetime.combine(self.date_to + timedelta(days=1), time.min),
+            company_ids=companies.ids,
+            lang=self.env.lang or 'en_US',
+        )
+
+    @api.model
+    def _get_export_formatter(self, res_model):
+        """Return the row formatter showing the selection labels of ``res_model``."""
+        Model = self.env[res_model]
+        selections = {
+            'Coverage': Model._fields['coverage']._description_selection(self.env),
+            'Status': Model._fields['status']._description_selection(self.env),
+            'Quotation Status': self.env['sale.order']._fields['state']._description_selection(self.env),
+        }
+        if 'stage' in Model._fields:
+            selections['Stage'] = Model._fields['stage']._description_selection(self.env)
+        return selection_formatter(EXPORT_QUERIES[res_model][0], selections)
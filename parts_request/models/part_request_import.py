@@ -0,0 +1,208 @@
+import base64
+import csv
+import io
+import logging
+
+import psycopg2
+from psycopg2.errors import DeadlockDetected, LockNotAvailable, SerializationFailure
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 200
+IMPORT_MAX_QUANTITY = 100
+IMPORT_COLUMNS = ('task', 'product', 'service_type', 'quantity')
+# transaction errors Odoo replays the request on, never reported as row errors
+CONCURRENCY_ERRORS = (LockNotAvailable, SerializationFailure, DeadlockDetected)
+
+
+class PartRequestImport(models.TransientModel):
+    """Bulk request of parts from a CSV file.
+
+    Columns: ``task`` (ticket number), ``product`` (internal reference or name
+    of the part), ``service_type`` (value or label), ``quantity`` and an
+    optional ``coverage``. A quantity of N creates N part lines. Every row is
+    validated first with one query per kind of record, the valid rows are then
+    created and requested by batches, and the invalid ones are reported.
+    """
+    _name = 'part.request.import'
+    _description = 'Parts Request Import'
+
+    file = fields.Binary(string='CSV File', required=True)
+    filename = fields.Char(string='File Name')
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft', readonly=True)
+    part_count = fields.Integer(string='Requested Parts', readonly=True)
+    error_count = fields.Integer(string='Rejected Rows', readonly=True)
+    report = fields.Text(string='Errors', readonly=True)
+
+    def action_import(self):
+        self.ensure_one()
+        rows, errors = self._read_rows()
+        part_vals, row_errors = self._validate_rows(rows)
+        errors.update(row_errors)
+        part_count, batch_errors = self._request_parts(part_vals)
+        errors.update(batch_errors)
+        self.write({
+            'state': 'done',
+            'part_count': part_count,
+            'error_count': len(errors),
+            'report': '\n'.join(_("Row %(row)s: %(error)s", row=row, error=errors[row]) for row in sorted(errors)),
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _read_rows(self):
+        """Return ``([(row number, {column: value})], {row number: error})``,
+        the rows with more values than columns being errors."""
+        try:
+            content = base64.b64decode(self.file).decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise UserError(_("The file must be a UTF-8 encoded CSV file."))
+        try:
+            dialect = csv.Sniffer().sniff(content[:4096], delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(io.StringIO(content), dialect=dialect)
+        columns = {(name or '').strip().lower() for name in reader.fieldnames or ()}
+        missing = [column for column in IMPORT_COLUMNS if column not in columns]
+        if missing:
+            raise UserError(_("Missing columns in the file: %s", ', '.join(missing)))
+        rows, errors = [], {}
+        for index, row in enumerate(reader, 2):
+            # the values beyond the header are listed under the None key
+            if row.get(None):
+                errors[index] = _("The row has more values than the file has columns.")
+                continue
+            rows.append((index, {
+                key.strip().lower(): (value or '').strip() for key, value in row.items() if key is not None
+            }))
+        return rows, errors
+
+    def _validate_rows(self, rows):
+        """Return ``(part values, {row number: error})``.
+
+        Tasks, products and supervisors are read once for the whole file.
+        """
+        Task = self.env['project.task']
+        tasks = Task.search([('sequence_fsm', 'in', list({row['task'] for _index, row in rows if row['task']}))])
+        tasks_by_ref = {task.sequence_fsm: task for task in tasks}
+
+        refs = list({row['product'] for _index, row in rows if row['product']})
+        products = self.env['product.template'].search([
+            ('is_part', '=', True), '|', ('default_code', 'in', refs), ('name', 'in', refs),
+        ])
+        # a reference matches the parts of that internal reference, or else
+        # of that name; several matches make the row ambiguous
+        products_by_ref = products.filtered('default_code').grouped('default_code')
+        for name, named_products in products.grouped('name').items():
+            products_by_ref.setdefault(name, named_products)
+
+        service_types = self.env['project.task.part']._fields['part_service_type']._description_selection(self.env)
+        service_type_by_value = {value.lower(): value for value, _label in service_types}
+        service_type_by_value.update({label.lower(): value for value, label in service_types})
+
+        part_vals, errors = [], {}
+        for index, row in rows:
+            task = tasks_by_ref.get(row['task'])
+            product = products_by_ref.get(row['product'])
+            service_type = service_type_by_value.get(row['service_type'].lower())
+            coverage = row.get('coverage', '').lower() or False
+            supervisor = task.department_id.manager_id if task else False
+            try:
+                quantity = int(row['quantity'] or 1)
+            except ValueError:
+                quantity = 0
+
+            if not task:
+                errors[index] = _("Unknown task %r.", row['task'])
+            elif not product:
+                errors[index] = _("Unknown part %r.", row['product'])
+            elif len(product) > 1:
+                errors[index] = _("Ambiguous part %r: %s parts have this name or internal reference.",
+                                  row['product'], len(product))
+            elif not service_type:
+                errors[index] = _("Unknown service type %r.", row['service_type'])
+            elif not 0 < quantity <= IMPORT_MAX_QUANTITY:
+                errors[index] = _("The quantity must be between 1 and %s.", IMPORT_MAX_QUANTITY)
+            elif task.is_closed:
+                errors[index] = _("Task %s is closed.", task.sequence_fsm)
+            elif not supervisor or not supervisor.user_id:
+                errors[index] = _("The department of task %s has no supervisor user.", task.sequence_fsm)
+            elif supervisor.company_id != task.company_id:
+                errors[index] = _("The supervisor and task %s belong to different companies.", task.sequence_fsm)
+            elif product.company_id and product.company_id != task.company_id:
+                errors[index] = _("Part %s does not belong to the company of task %s.",
+                                  product.display_name, task.sequence_fsm)
+            elif coverage not in (False, 'foc', 'chargeable'):
+                errors[index] = _("The coverage must be FOC or Chargeable.")
+            elif coverage == 'chargeable' and not task.partner_id:
+                errors[index] = _("Task %s has no customer to approve a chargeable part.", task.sequence_fsm)
+            else:
+                vals = {
+                    'task_id': task.id,
+                    'product_id': product.id,
+                    'part_service_type': service_type,
+                }
+                if coverage:
+                    vals['coverage'] = coverage
+                part_vals.append((index, [vals] * quantity))
+        return part_vals, errors
+
+    def _request_parts(self, part_vals, batch_size=IMPORT_BATCH_SIZE):
+        """Create and request the parts of ``[(row number, [values])]`` by
+        batches of about ``batch_size`` parts, whole rows only. A failing
+        batch, on a user or a database error, is rolled back and its rows are
+        retried one by one, so that only the faulty rows are reported. A
+        concurrency error is raised as is, for Odoo to retry the import.
+
+        Return ``(part count, {row number: error})``.
+        """
+        batches, batch, batch_parts = [], [], 0
+        for index, vals_list in part_vals:
+            batch.append((index, vals_list))
+            batch_parts += len(vals_list)
+            if batch_parts >= batch_size:
+                batches.append(batch)
+                batch, batch_parts = [], 0
+        if batch:
+            batches.append(batch)
+
+        part_count, errors = 0, {}
+        for batch in batches:
+            try:
+                part_count += self._request_batch(batch)
+            except CONCURRENCY_ERRORS:
+                # not a row error: the whole import is retried by the server
+                raise
+            except (UserError, ValueError, psycopg2.Error) as error:
+                if len(batch) == 1:
+                    errors[batch[0][0]] = str(error)
+                    continue
+                _logger.info('Parts import batch failed, retrying its rows one by one: %s', error)
+                for row in batch:
+                    try:
+                        part_count += self._request_batch([row])
+                    except CONCURRENCY_ERRORS:
+                        raise
+                    except (UserError, ValueError, psycopg2.Error) as row_error:
+                        errors[row[0]] = str(row_error)
+        return part_count, errors
+
+    def _request_batch(self, batch):
+        """Create and request the parts of ``batch`` in a savepoint, return their count."""
+        try:
+            with self.env.cr.savepoint():
+                parts = self.env['project.task.part'].create(
+                    [vals for _index, vals_list in batch for vals in vals_list])
+                parts.action_parts_request()
+        except Exception:
+            self.env.invalidate_all()
+            raise
+        return len(parts)
@@ -0,0 +1,136 @@
+from psycopg2.extras import execute_values
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+TRANSITION_MODELS = [
+    ('project.task.part', 'Part'),
+    ('part.approval.notification', 'Approval Notification'),
+    ('part.customer.approval.notification', 'Customer Approval Notification'),
+]
+
+PERCENTILE_FIELDS = {
+    'duration_p50': 0.50,
+    'duration_p90': 0.90,
+    'duration_p95': 0.95,
+}
+
+
+class PartStatusTransition(models.Model):
+    """Append-only log of the status changes of parts and their notifications.
+
+    Rows are inserted in SQL by ``_log_transitions``, one query per write,
+    and carry the time spent in the previous state.
+    """
+    _name = 'part.status.transition'
+    _description = 'Part Status Transition'
+    _order = 'date desc, id desc'
+    _rec_name = 'to_state'
+    _log_access = False
+
+    res_model = fields.Selection(TRANSITION_MODELS, string='Document Model', required=True, readonly=True)
+    res_id = fields.Many2oneReference(string='Document', model_field='res_model', required=True, readonly=True)
+    field_name = fields.Char(string='Field', required=True, readonly=True)
+    part_id = fields.Many2one('project.task.part', string='Part', readonly=True, ondelete='set null', index='btree_not_null')
+    from_state = fields.Char(string='From', readonly=True)
+    to_state = fields.Char(string='To', required=True, readonly=True)
+    date = fields.Datetime(string='Date', required=True, readonly=True, index=True)
+    duration = fields.Float(string='Hours in Previous State', readonly=True)
+    user_id = fields.Many2one('res.users', string='Actor', readonly=True, ondelete='set null')
+    company_id = fields.Many2one('res.company', string='Company', readonly=True, ondelete='set null')
+    warehouse_id = fields.Many2one('stock.warehouse', string='Warehouse', readonly=True, ondelete='set null')
+    supervisor_id = fields.Many2one('hr.employee', string='Supervisor', readonly=True, ondelete='set null')
+
+    def init(self):
+        # time each document entered its current state, and time range
+        # queries per company
+        tools.create_index(self._cr, 'part_status_transition_document_date_index',
+                           self._table, ['res_model', 'res_id', 'field_name', 'date'])
+        tools.create_index(self._cr, 'part_status_transition_company_date_index',
+                           self._table, ['company_id', 'date'])
+
+    @api.model
+    def _log_transitions(self, records, field_name, previous):
+        """Log the records whose ``field_name`` differs from ``previous`` (id -> old value).
+
+        Dimensions come from ``records._get_transition_values()``.
+        """
+        changed = records.filtered(lambda rec: previous.get(rec.id) != rec[field_name])
+        if not changed:
+            return
+
+        # a document entered its previous state at its last transition, or
+        # at its creation for the first one
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (res_id) res_id, date
+              FROM part_status_transition
+             WHERE res_model = %s AND field_name = %s AND res_id IN %s
+          ORDER BY res_id, date DESC
+        """, (records._name, field_name, tuple(changed.ids)))
+        entered = dict(self.env.cr.fetchall())
+
+        now = fields.Datetime.now()
+        rows = []
+        for rec in changed:
+            since = entered.get(rec.id) or rec.create_date
+            values = rec._get_transition_values()
+            rows.append((
+                rec._name, rec.id, field_name, values.get('part_id') or None,
+                previous.get(rec.id) or None, rec[field_name], now,
+                (now - since).total_seconds() / 3600 if since else None,
+                self.env.uid, values.get('company_id') or None,
+                values.get('warehouse_id') or None, values.get('supervisor_id') or None,
+            ))
+        execute_values(self.env.cr._obj, """
+            INSERT INTO part_status_transition (
+                res_model, res_id, field_name, part_id, from_state, to_state, date,
+                duration, user_id, company_id, warehouse_id, supervisor_id
+            ) VALUES %s
+        """, rows)
+
+
+class PartStatusDurationReport(models.Model):
+    """Time spent in each state, with exact percentiles per group in pivot and graph views."""
+    _name = 'part.status.duration.report'
+    _description = 'Parts Time in State'
+    _auto = False
+    _order = 'date desc'
+
+    res_model = fields.Selection(TRANSITION_MODELS, string='Document Model', readonly=True)
+    part_id = fields.Many2one('project.task.part', string='Part', readonly=True)
+    state = fields.Char(string='State', readonly=True)
+    date = fields.Datetime(string='Left State On', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    warehouse_id = fields.Many2one('stock.warehouse', string='Warehouse', readonly=True)
+    supervisor_id = fields.Many2one('hr.employee', string='Supervisor', readonly=True)
+    duration = fields.Float(string='Hours (avg)', readonly=True, group_operator='avg')
+    duration_max = fields.Float(string='Hours (max)', readonly=True, group_operator='max')
+    # aggregated with percentile_cont, see _read_group_select
+    duration_p50 = fields.Float(string='Hours (p50)', readonly=True, group_operator='max')
+    duration_p90 = fields.Float(string='Hours (p90)', readonly=True, group_operator='max')
+    duration_p95 = fields.Float(string='Hours (p95)', readonly=True, group_operator='max')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT id, res_model, part_id, from_state AS state, date,
+                       company_id, warehouse_id, supervisor_id,
+                       duration, duration AS duration_max, duration AS duration_p50,
+                       duration AS duration_p90, duration AS duration_p95
+                  FROM part_status_transition
+                 WHERE from_state IS NOT NULL
+                   AND duration IS NOT NULL
+                   AND field_name IN ('status', 'stage')
+            )
+        """)
+
+    def _read_group_select(self, aggregate_spec, query):
+        fname, __, __ = aggregate_spec.partition(':')
+        if fname in PERCENTILE_FIELDS:
+            return SQL(
+                "percentile_cont(%s) WITHIN GROUP (ORDER BY %s)",
+                PERCENTILE_FIELDS[fname],
+                self._field_to_sql(self._table, 'duration', query),
+            )
+        return super()._read_group_select(aggregate_spec, query)
@@ -0,0 +1,61 @@
+import json
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+
+class PartSyncEvent(models.Model):
+    """Result of an offline event applied by ``/parts_request/api/events``, by idempotency key.
+
+    Kept ``parts_request.sync_event_days`` days (30 by default), an event
+    replayed within that period is answered from here instead of running again.
+    """
+    _name = 'part.sync.event'
+    _description = 'Applied Offline Part Event'
+    _order = 'id desc'
+    _rec_name = 'key'
+    _log_access = False
+
+    user_id = fields.Many2one('res.users', string='User', required=True, readonly=True, ondelete='cascade')
+    key = fields.Char(string='Idempotency Key', required=True, readonly=True)
+    event_type = fields.Char(string='Type', readonly=True)
+    result = fields.Text(string='Result', readonly=True)
+    date = fields.Datetime(string='Applied On', required=True, readonly=True, index=True)
+
+    _sql_constraints = [
+        ('user_key_uniq', 'unique(user_id, key)', 'An event with this key has already been applied.'),
+    ]
+
+    @api.model
+    def _get_results(self, user, keys):
+        """Return {key: result} of the events of ``user`` already applied among ``keys``."""
+        events = self.search_read([('user_id', '=', user.id), ('key', 'in', [str(key) for key in keys])],
+                                  ['key', 'result'])
+        return {event['key']: json.loads(event['result']) for event in events if event['result']}
+
+    @api.model
+    def _claim(self, user, key, event_type):
+        """Reserve ``key`` for ``user``, return the id of the new event or None
+        when the key is already taken.
+
+        The insert waits for a concurrent delivery of the key: once that one
+        commits, the insert fails with a serialization failure and the request
+        is replayed, where ``_get_results`` finds the stored result.
+        """
+        self.env.cr.execute("""
+            INSERT INTO part_sync_event (user_id, key, event_type, date) VALUES (%s, %s, %s, %s)
+            ON CONFLICT (user_id, key) DO NOTHING
+            RETURNING id
+        """, (user.id, key, event_type, fields.Datetime.now()))
+        row = self.env.cr.fetchone()
+        return row and row[0]
+
+    @api.model
+    def _set_result(self, event_id, result):
+        self.env.cr.execute("UPDATE part_sync_event SET result = %s WHERE id = %s", (json.dumps(result), event_id))
+
+    @api.autovacuum
+    def _gc_old_events(self):
+        days = int(self.env['ir.config_parameter'].sudo().get_param('parts_request.sync_event_days', 30))
+        self.env.cr.execute("DELETE FROM part_sync_event WHERE date < %s",
+                            (fields.Datetime.now() - timedelta(days=days),))
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from psycopg2.extras import execute_values
+
+from odoo import models, fields, api
+
+from .part_status_transition import TRANSITION_MODELS
+
+
+class PartSyncTombstone(models.Model):
+    """Deleted parts and notifications, for the delta sync of the mobile application.
+
+    Rows are written in SQL by ``_record`` when the records are unlinked, or
+    leave the tasks of some users, and kept
+    ``parts_request.sync_tombstone_days`` days (90 by default); clients whose
+    last sync is older must pull a full snapshot again. A row is written per
+    partner that synced the record, the customer and the assignees of its
+    task, so that it is still found once the task is deleted.
+    """
+    _name = 'part.sync.tombstone'
+    _description = 'Deleted Part Record'
+    _order = 'id'
+    _log_access = False
+
+    res_model = fields.Selection(TRANSITION_MODELS, string='Document Model', required=True, readonly=True)
+    res_id = fields.Integer(string='Document ID', required=True, readonly=True)
+    # the task may be deleted along the record, hence no foreign key
+    task_id = fields.Integer(string='Task ID', readonly=True, index=True)
+    # partner of the user the record is removed from, no foreign key either
+    partner_id = fields.Integer(string='Partner ID', readonly=True, index=True)
+    date = fields.Datetime(string='Deleted On', required=True, readonly=True)
+
+    @api.model
+    def _get_retention_days(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param('parts_request.sync_tombstone_days', 90))
+
+    @api.model
+    def _record(self, records, partners=None):
+        """Record the removal of ``records`` for ``partners``, by default for
+        everyone their task is synced to."""
+        if not records:
+            return
+        now = fields.Datetime.now()
+        rows = []
+        for rec in records.sudo():
+            audience = partners if partners is not None else rec.task_id._get_sync_partners()
+            rows += [(rec._name, rec.id, rec.task_id.id or None, partner_id, now)
+                     for partner_id in audience.ids or [None]]
+        execute_values(self.env.cr._obj, """
+            INSERT INTO part_sync_tombstone (res_model, res_id, task_id, partner_id, date) VALUES %s
+        """, rows)
+
+    @api.autovacuum
+    def _gc_old_tombstones(self):
+        self.env.cr.execute(
+            "DELETE FROM part_sync_tombstone WHERE date < %s",
+            (fields.Datetime.now() - timedelta(days=self._get_retention_days()),),
+        )
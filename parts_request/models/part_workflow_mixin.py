@@ -0,0 +1,89 @@
+from collections import defaultdict
+
+from odoo import models, tools
+
+
+class PartWorkflowMixin(models.AbstractModel):
+    _name = 'part.workflow.mixin'
+    _description = 'Parts Workflow Row Locking'
+
+    # workflow state fields: pushed on the bus when they change, and tracked
+    # in the transition log only when the company enables lightweight tracking
+    _workflow_status_fields = ('status',)
+    _workflow_company_field = 'company_id'
+
+    def _lock_for_transition(self, skip_locked=False):
+        """Lock the rows of the records with SELECT ... FOR UPDATE, in id order.
+
+        Return the locked records, with their cache invalidated so that the
+        caller checks their current state.
+
+        A row held by another transaction is waited for. Transactions run at
+        REPEATABLE READ: when the other transaction commits a change of the
+        row, the lock raises a serialization failure, which Odoo answers by
+        replaying the request or job on a new snapshot, where the caller's
+        re-check sees the transition and does nothing. With ``skip_locked``,
+        rows held by another transaction are left out of the result instead.
+        """
+        if not self:
+            return self
+        self.flush_recordset()
+        query = f'SELECT id FROM "{self._table}" WHERE id IN %s ORDER BY id FOR UPDATE'
+        if skip_locked:
+            query += ' SKIP LOCKED'
+        self.env.cr.execute(query, (tuple(self.ids),))
+        locked_ids = [row[0] for row in self.env.cr.fetchall()]
+        locked = self.browse(locked_ids)
+        locked.invalidate_recordset()
+        return locked
+
+    def _create_sync_index(self):
+        """Index the (write_date, id) keyset scanned by the delta sync of the mobile application."""
+        tools.create_index(self._cr, f'{self._table}_write_date_id_index', self._table, ['write_date', 'id'])
+
+    def _filter_lightweight_tracking(self, fnames):
+        """Drop the status fields from the tracked ``fnames`` when all the companies
+        of the records track them in ``part.status.transition`` only."""
+        companies = self.mapped(self._workflow_company_field) if self else self.env.company
+        if fnames and companies and all(companies.mapped('parts_lightweight_tracking')):
+            return fnames - set(self._workflow_status_fields)
+        return fnames
+
+    def _get_status_bus_partners(self):
+        """Partners whose portal pages and backend lists show the record: the
+        customer, the assignees and the supervisor of its task."""
+        self.ensure_one()
+        task = self.task_id
+        return task.partner_id | task.user_ids.partner_id | task.department_id.manager_id.user_id.partner_id
+
+    def _get_status_bus_payload(self):
+        self.ensure_one()
+        payload = {'model': self._name, 'id': self.id, 'task_id': self.task_id.id}
+        for fname in self._workflow_status_fields:
+            labels = dict(self._fields[fname]._description_selection(self.env))
+            payload[fname] = self[fname]
+            payload[f'{fname}_label'] = labels.get(self[fname])
+        return payload
+
+    def _send_status_bus(self):
+        """Push the workflow state of the records on the bus, one message per partner,
+        so that open pages update their rows instead of being reloaded."""
+        payloads = defaultdict(list)
+        for rec in self.sudo():
+            payload = rec._get_status_bus_payload()
+            for partner in rec._get_status_bus_partners():
+                payloads[partner].append(payload)
+        if payloads:
+            self.env['bus.bus'].sudo()._sendmany([
+                (partner, 'parts_request/status', partner_payloads)
+                for partner, partner_payloads in payloads.items()
+            ])
+
+    def _lock_workflow(self):
+        """Lock the notifications and their parts before a status transition.
+
+        The parts are locked first, see ``project.task.part._lock_workflow``.
+        Return the locked records.
+        """
+        self.part_id._lock_workflow()
+        return self._lock_for_transition()
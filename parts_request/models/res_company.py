@@ -8,6 +8,19 @@ class ResCompany(models.Model):
                                         string="Warehouse", default="internal_warehouse")
     enable_direct_pickup = fields.Boolean("Direct Pickup")
     enable_shipment_to_customer = fields.Boolean("Shipment To Customer")
+    parts_lightweight_tracking = fields.Boolean(
+        "Lightweight Parts Tracking",
+        help="Record the status changes of parts and their approvals in the transition log only, "
+             "without chatter tracking messages.")
+
+    def _get_portal_receivable_part_status(self):
+        """Return the part status from which the customer can receive a part, or False."""
+        self.ensure_one()
+        if self.enable_direct_pickup:
+            return 'pick_up'
+        if self.enable_shipment_to_customer:
+            return 'shipment'
+        return False
 
 class HrEmployee(models.Model):
     _inherit = 'hr.employee'
@@ -0,0 +1,21 @@
+from odoo import models, fields
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    # set on the moves of the transfers grouped by warehouse and customer
+    part_id = fields.Many2one('project.task.part', string='Part', readonly=True, ondelete='set null',
+                              index='btree_not_null')
+    part_notification_id = fields.Many2one('part.approval.notification', string='Part Notification',
+                                           readonly=True, ondelete='set null', index='btree_not_null')
+
+    def init(self):
+        super().init()
+        # a part notification is shipped by a single live move, whatever
+        # the concurrent runs of the transfer creation
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS stock_move_part_notification_uniq
+                ON stock_move (part_notification_id)
+             WHERE part_notification_id IS NOT NULL AND state != 'cancel'
+        """)
@@ -0,0 +1,39 @@
+/** @odoo-module **/
+
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { listView } from "@web/views/list/list_view";
+import { ListController } from "@web/views/list/list_controller";
+import { onWillUnmount } from "@odoo/owl";
+
+/**
+ * Reload the displayed notifications whose state changed, from the
+ * ``parts_request/status`` messages of the bus, instead of waiting for the
+ * user to refresh the whole view.
+ */
+export class PartApprovalListController extends ListController {
+    setup() {
+        super.setup();
+        this.busService = useService("bus_service");
+        const onStatus = (payloads) => this.onPartsStatus(payloads);
+        this.busService.subscribe("parts_request/status", onStatus);
+        onWillUnmount(() => this.busService.unsubscribe("parts_request/status", onStatus));
+    }
+
+    async onPartsStatus(payloads) {
+        const changedIds = new Set(
+            payloads
+                .filter((payload) => payload.model === this.props.resModel)
+                .map((payload) => payload.id)
+        );
+        const records = this.model.root.records.filter(
+            (record) => changedIds.has(record.resId) && !record.isInEdition
+        );
+        await Promise.all(records.map((record) => record.load()));
+    }
+}
+
+registry.category("views").add("part_approval_notification_list", {
+    ...listView,
+    Controller: PartApprovalListController,
+});
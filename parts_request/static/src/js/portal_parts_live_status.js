@@ -0,0 +1,57 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+
+/**
+ * Patch the parts rows of the portal pages in place when their state changes,
+ * from the ``parts_request/status`` messages sent on the partner bus channel.
+ * The actions of a changed row are replaced by a reload link since their
+ * availability depends on server-side rules.
+ */
+publicWidget.registry.PartsLiveStatus = publicWidget.Widget.extend({
+    selector: ".o_parts_live",
+
+    start() {
+        this.busService = this.bindService("bus_service");
+        this._onStatus = this._onStatus.bind(this);
+        this.busService.subscribe("parts_request/status", this._onStatus);
+        this.busService.start();
+        return this._super(...arguments);
+    },
+
+    destroy() {
+        this.busService?.unsubscribe("parts_request/status", this._onStatus);
+        this._super(...arguments);
+    },
+
+    _onStatus(payloads) {
+        for (const payload of payloads) {
+            const row = this.el.querySelector(
+                `tr[data-parts-live-model="${payload.model}"][data-parts-live-id="${payload.id}"]`
+            );
+            if (!row) {
+                continue;
+            }
+            const label = payload.stage_label || payload.status_label;
+            const status = row.querySelector(".o_parts_live_status");
+            if (label && status && status.textContent.trim() !== label) {
+                status.textContent = label;
+                this._markChanged(row);
+            }
+        }
+    },
+
+    _markChanged(row) {
+        row.classList.add("table-info");
+        const actions = row.querySelector(".o_parts_live_actions");
+        if (actions) {
+            const link = document.createElement("a");
+            link.href = window.location.href;
+            link.className = "btn btn-link btn-sm";
+            link.textContent = "Updated, reload";
+            actions.replaceChildren(link);
+        }
+    },
+});
+
+export default publicWidget.registry.PartsLiveStatus;
@@ -0,0 +1,27 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+
+const fragments = {};
+
+/**
+ * Fill the parts placeholders of the ticket page with the fragment served by
+ * ``/my/ticket/<id>/parts``, fetched once per page after it is displayed.
+ */
+publicWidget.registry.PartsTicketFragment = publicWidget.Widget.extend({
+    selector: ".o_parts_fragment",
+
+    async start() {
+        await this._super(...arguments);
+        const url = this.el.dataset.partsUrl;
+        fragments[url] ??= fetch(url, { credentials: "same-origin" }).then((response) =>
+            response.ok ? response.text() : ""
+        );
+        const html = await fragments[url];
+        const doc = new DOMParser().parseFromString(html, "text/html");
+        const fragment = doc.querySelector(`[data-parts-fragment="${this.el.dataset.partsFragment}"]`);
+        this.el.replaceChildren(...(fragment ? fragment.childNodes : []));
+    },
+});
+
+export default publicWidget.registry.PartsTicketFragment;
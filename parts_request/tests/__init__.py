@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from . import test_workflow_locking
+from . import test_parts_benchmark
+from . import test_query_budgets
+from . import test_lookup_indexes
+from . import test_record_rules
+from . import test_lightweight_tracking
+from . import test_sync_tombstones
@@ -0,0 +1,291 @@
+import re
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from odoo.tests import HttpCase
+
+
+class PartsFlowCase(HttpCase):
+    """Synthetic parts datasets and measurement helpers for the benchmark and
+    query budget tests. Everything runs in the test transaction, which is
+    rolled back at the end of the test."""
+
+    # ------------------------------------------------------------
+    # Data generation
+    # ------------------------------------------------------------
+
+    def _create_flow_user(self, login, company, groups, employee_vals=None):
+        """Create a user whose password is its login, and its employee when
+        ``employee_vals`` is given."""
+        user = self.env['res.users'].with_context(no_reset_password=True).create({
+            'name': login.replace('_', ' ').title(),
+            'login': login,
+            'password': login,
+            'company_id': company.id,
+            'company_ids': [(6, 0, company.ids)],
+            'groups_id': [(6, 0, [self.env.ref(xmlid).id for xmlid in groups])],
+        })
+        employee = self.env['hr.employee']
+        if employee_vals is not None:
+            employee = employee.create(dict(employee_vals, name=user.name, user_id=user.id, company_id=company.id))
+        return user, employee
+
+    def _generate_dataset(self, prefix, warehouses=2, location_depth=4, tasks=20, parts_per_task=3,
+                          lightweight_tracking=False):
+        """Create a company with its users, warehouses, past deliveries, tasks
+        and parts, and return them as a dict.
+
+        The last delivery of the customer leaves from the deepest location of
+        the warehouses so that warehouse detection climbs the whole tree.
+        With ``lightweight_tracking``, the company logs the status changes in
+        the transition log only.
+        """
+        service_types = self.env['project.task.part']._fields['part_service_type']._description_selection(self.env)
+        customer_location = self.env.ref('stock.stock_location_customers')
+        products = self.env['product.template'].create([{
+            'name': f'{prefix} Part {index}',
+            'is_part': True,
+            'type': 'product',
+            'list_price': 100.0 + index,
+        } for index in range(max(parts_per_task, 1))])
+        company = self.env['res.company'].create({
+            'name': f'{prefix} Company',
+            'enable_warehouse': 'internal_warehouse',
+            'enable_direct_pickup': True,
+            'enable_shipment_to_customer': True,
+            'parts_lightweight_tracking': lightweight_tracking,
+        })
+        internal_groups = ['base.group_user', 'industry_fsm.group_fsm_user']
+        login = prefix.lower().replace(' ', '_')
+        supervisor_user, supervisor = self._create_flow_user(f'{login}_supervisor', company, internal_groups, {})
+        manager_user, manager = self._create_flow_user(
+            f'{login}_manager', company, internal_groups, {'warehouse_manager': True})
+        technician_user, _technician = self._create_flow_user(f'{login}_technician', company, internal_groups, {})
+        customer_user, _customer = self._create_flow_user(f'{login}_customer', company, ['base.group_portal'])
+        department = self.env['hr.department'].create({
+            'name': f'{prefix} Service',
+            'manager_id': supervisor.id,
+            'company_id': company.id,
+        })
+
+        deepest_location = self.env['stock.location']
+        for warehouse_index in range(warehouses):
+            warehouse = self.env['stock.warehouse'].create({
+                'name': f'{prefix} Warehouse {warehouse_index}',
+                'code': f'PF{warehouse_index:02d}',
+                'company_id': company.id,
+                'manager': manager.id,
+            })
+            location = warehouse.lot_stock_id
+            for depth in range(location_depth):
+                location = self.env['stock.location'].create({
+                    'name': f'Level {depth}',
+                    'location_id': location.id,
+                    'usage': 'internal',
+                    'company_id': company.id,
+                })
+            deepest_location = location
+
+        picking_type = self.env['stock.picking.type'].search([
+            ('code', '=', 'outgoing'), ('company_id', '=', company.id),
+        ], limit=1)
+        for product in products:
+            variant = product.product_variant_id
+            picking = self.env['stock.picking'].create({
+                'partner_id': customer_user.partner_id.id,
+                'picking_type_id': picking_type.id,
+                'location_id': deepest_location.id,
+                'location_dest_id': customer_location.id,
+                'company_id': company.id,
+            })
+            move = self.env['stock.move'].create({
+                'name': variant.display_name,
+                'picking_id': picking.id,
+                'product_id': variant.id,
+                'product_uom': variant.uom_id.id,
+                'product_uom_qty': 1.0,
+                'location_id': deepest_location.id,
+                'location_dest_id': customer_location.id,
+                'company_id': company.id,
+            })
+            self.env['stock.move.line'].create({
+                'move_id': move.id,
+                'picking_id': picking.id,
+                'product_id': variant.id,
+                'product_uom_id': variant.uom_id.id,
+                'quantity': 1.0,
+                'location_id': deepest_location.id,
+                'location_dest_id': customer_location.id,
+                'company_id': company.id,
+            })
+
+        project = self.env['project.project'].create({
+            'name': f'{prefix} Field Service',
+            'is_fsm': True,
+            'company_id': company.id,
+        })
+        task_records = self.env['project.task'].create([{
+            'name': f'{prefix} Call {index}',
+            'project_id': project.id,
+            'partner_id': customer_user.partner_id.id,
+            'user_ids': [(6, 0, technician_user.ids)],
+            'department_id': department.id,
+            'company_id': company.id,
+        } for index in range(tasks)])
+        parts = self.env['project.task.part'].create([{
+            'task_id': task.id,
+            'product_id': products[index % len(products)].id,
+            'part_service_type': service_types[index % len(service_types)][0],
+            # every other part goes through the chargeable flow
+            'coverage': 'chargeable' if index % 2 else 'foc',
+        } for task in task_records for index in range(parts_per_task)])
+
+        return {
+            'company': company,
+            'supervisor_user': supervisor_user,
+            'manager_user': manager_user,
+            'technician_user': technician_user,
+            'customer_user': customer_user,
+            'tasks': task_records,
+            'parts': parts,
+        }
+
+    def _share_companies(self, datasets):
+        """Give the internal users of every dataset access to the companies of
+        all of them, so that their record rules run on several companies."""
+        companies = self.env['res.company'].browse([dataset['company'].id for dataset in datasets])
+        for dataset in datasets:
+            for role in ('supervisor', 'manager', 'technician'):
+                dataset[f'{role}_user'].company_ids = [(6, 0, companies.ids)]
+
+    def _user_env(self, dataset, role):
+        """Environment of a user of ``dataset``, in the dataset company first,
+        along with the other companies of the user."""
+        company = dataset['company']
+        user = dataset[f'{role}_user']
+        return self.env(user=user, context=dict(
+            self.env.context, allowed_company_ids=company.ids + (user.company_ids - company).ids))
+
+    def _pay_orders(self, orders):
+        """Confirm, invoice and fully pay ``orders``, return the invoices."""
+        orders.action_confirm()
+        invoices = orders._create_invoices()
+        invoices.action_post()
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoices.ids,
+        ).create({'group_payment': False})._create_payments()
+        return invoices
+
+    # ------------------------------------------------------------
+    # Flow
+    # ------------------------------------------------------------
+
+    def _run_scenarios(self, dataset):
+        """Push the parts of ``dataset`` through the whole flow and return the
+        measurement of every step."""
+        results = []
+        parts = dataset['parts'].with_company(dataset['company'])
+        chargeable = parts.filtered(lambda p: p.coverage == 'chargeable')
+        supervisor_env = self._user_env(dataset, 'supervisor')
+        manager_env = self._user_env(dataset, 'manager')
+
+        with self._measure(results, 'action_parts_request', len(parts)):
+            parts.with_user(dataset['technician_user']).action_parts_request()
+
+        notifications = parts.approval_notification_ids
+        with self._measure(results, 'supervisor_approve', len(notifications)):
+            notifications.with_env(supervisor_env).action_approve()
+
+        orders = self.env['sale.order']
+        for part in chargeable:
+            orders |= part._create_ticket_quotation(part.task_id, part)
+        with self._measure(results, 'quotation_send', len(orders)):
+            orders.write({'state': 'sent'})
+
+        customer_notifications = chargeable.customer_approval_notification_ids
+        with self._measure(results, 'customer_approve', len(customer_notifications)):
+            customer_notifications.action_approve()
+
+        with self._measure(results, 'request_warehouse_manager', len(notifications)):
+            notifications.with_env(supervisor_env).action_request_warehouse_manager()
+        with self._measure(results, 'action_part_available', len(notifications)):
+            notifications.with_env(manager_env).action_part_available()
+
+        self._pay_orders(orders)
+        with self._measure(results, 'payment_post_processing', len(orders)):
+            for order in orders:
+                for invoice in order.invoice_ids:
+                    order._handle_part_invoice_payment(invoice)
+
+        with self._measure(results, 'receive_parts', len(parts)):
+            parts._action_customer_receive()
+
+        # list views and counters of non-admin users, filtered by the record rules
+        Notification = self.env['part.approval.notification']
+        for scenario, role in (('rules_search_supervisor', 'supervisor'),
+                               ('rules_search_manager', 'manager'),
+                               ('rules_search_technician', 'technician')):
+            user_notifications = Notification.with_env(self._user_env(dataset, role))
+            with self._measure(results, scenario, len(notifications)):
+                user_notifications.search_count([])
+                user_notifications.search([], limit=80)
+
+        customer = dataset['customer_user']
+        self.authenticate(customer.login, customer.login)
+        task = dataset['tasks'][:1]
+        for scenario, url, records in (
+            ('portal_parts_request', '/my/parts/request', len(customer_notifications)),
+            ('portal_my_tickets', '/my/view', len(dataset['tasks'])),
+            ('portal_open_tickets', '/my/open/ticket', len(dataset['tasks'])),
+            ('portal_ticket', f'/my/ticket/{task.id}', len(task.part_ids)),
+            ('portal_ticket_parts', f'/my/ticket/{task.id}/parts', len(task.part_ids)),
+        ):
+            with self._measure(results, scenario, records):
+                self.url_open(url)
+        return results
+
+    # ------------------------------------------------------------
+    # Measurements
+    # ------------------------------------------------------------
+
+    @contextmanager
+    def _measure(self, results, scenario, records=1):
+        """Measure the enclosed block and append its wall time, query count
+        and SQL time to ``results``.
+
+        Pending writes are flushed before the block, so that they are not
+        counted, and inside it, so that the writes of the block are. The
+        queries are timed on the test cursor, which the HTTP requests of the
+        test share.
+        """
+        self.env.flush_all()
+        sql_time = 0.0
+        execute = self.cr.execute
+
+        def timed_execute(*args, **kwargs):
+            nonlocal sql_time
+            start = time.perf_counter()
+            try:
+                return execute(*args, **kwargs)
+            finally:
+                sql_time += time.perf_counter() - start
+
+        query_count = self.cr.sql_log_count
+        start = time.perf_counter()
+        with patch.object(self.cr, 'execute', timed_execute):
+            yield
+            self.env.flush_all()
+        results.append({
+            'scenario': scenario,
+            'records': records,
+            'wall_time': time.perf_counter() - start,
+            'query_count': self.cr.sql_log_count - query_count,
+            'sql_time': sql_time,
+        })
+        self.env.invalidate_all()
+
+    def _portal_csrf_token(self):
+        response = self.url_open('/my')
+        match = re.search(r'csrf_token["\']?\s*(?::|value=)\s*["\']([^"\']+)', response.text)
+        return match.group(1) if match else ''
@@ -0,0 +1,50 @@
+from odoo.tests import tagged
+
+from .common import PartsFlowCase
+
+
+@tagged('post_install', '-at_install')
+class TestLightweightTracking(PartsFlowCase):
+    """With lightweight tracking, the status changes are logged in the
+    transition log only: no tracking values, fewer queries per transition."""
+
+    def _approve(self, dataset):
+        """Approve the requested parts of ``dataset`` as the supervisor, return
+        the query count of the approval and its status tracking values."""
+        parts = dataset['parts'].with_company(dataset['company'])
+        parts.with_user(dataset['technician_user']).action_parts_request()
+        notifications = parts.approval_notification_ids
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+
+        query_count = self.cr.sql_log_count
+        notifications.with_env(self._user_env(dataset, 'supervisor')).action_approve()
+        # the tracking values are written when the transaction commits
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+        self.env.flush_all()
+        query_count = self.cr.sql_log_count - query_count
+
+        tracking_count = sum(
+            self.env['mail.tracking.value'].search_count([
+                ('field_id.model', '=', records._name),
+                ('field_id.name', '=', 'status'),
+                ('mail_message_id.model', '=', records._name),
+                ('mail_message_id.res_id', 'in', records.ids),
+            ])
+            for records in (parts, notifications)
+        )
+        return query_count, tracking_count
+
+    def test_lightweight_tracking(self):
+        tracked_queries, tracked_values = self._approve(self._generate_dataset('Tracked', tasks=5))
+        lightweight = self._generate_dataset('Lightweight', tasks=5, lightweight_tracking=True)
+        light_queries, light_values = self._approve(lightweight)
+
+        self.assertTrue(tracked_values, "The status changes are tracked by default")
+        self.assertEqual(light_values, 0, "No status tracking value is written in lightweight mode")
+        self.assertLess(light_queries, tracked_queries)
+        transitions = self.env['part.status.transition'].search_count([
+            ('company_id', '=', lightweight['company'].id),
+        ])
+        self.assertTrue(transitions, "The status changes are still logged as transitions")
@@ -0,0 +1,29 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestLookupIndexes(TransactionCase):
+    """The (task, part) lookups of the payment hooks and portal are served by an index."""
+
+    def assertIndexScan(self, query, params, index):
+        # the test tables are too small for the planner to prefer an index on
+        # its own: disable sequential scans to check that the index applies
+        self.env.cr.execute("SET LOCAL enable_seqscan = off")
+        self.env.cr.execute(f"EXPLAIN {query}", params)
+        plan = '\n'.join(row[0] for row in self.env.cr.fetchall())
+        self.assertRegex(plan, rf'(Index (Only )?Scan using|Bitmap Index Scan on) {index}\b', plan)
+
+    def test_notification_lookups(self):
+        for table in ('part_approval_notification', 'part_customer_approval_notification'):
+            with self.subTest(table=table):
+                self.assertIndexScan(
+                    f"SELECT id FROM {table} WHERE task_id = %s AND part_id = %s", (1, 1),
+                    f'{table}_task_part_uniq')
+                self.assertIndexScan(
+                    f"SELECT id FROM {table} WHERE part_id = %s", (1,),
+                    f'{table}__part_id_index')
+
+    def test_quotation_lookup(self):
+        self.assertIndexScan(
+            "SELECT id FROM sale_order WHERE ticket_id = %s AND part_id = %s",
+            (1, 1), 'sale_order_ticket_id_part_id_index')
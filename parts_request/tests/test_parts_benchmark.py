@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+from datetime import datetime
+
+from odoo.tests import tagged
+from odoo.tools import config
+
+from .common import PartsFlowCase
+
+_logger = logging.getLogger(__name__)
+
+# dataset size per company, number of companies sharing their users, and
+# the result file of a previous run to report regressions
+BENCHMARK_TASKS = int(os.environ.get('PARTS_BENCHMARK_TASKS', 200))
+BENCHMARK_COMPANIES = int(os.environ.get('PARTS_BENCHMARK_COMPANIES', 3))
+BENCHMARK_BASELINE = os.environ.get('PARTS_BENCHMARK_BASELINE')
+WALL_TIME_TOLERANCE = 0.2
+
+
+@tagged('-standard', 'parts_benchmark', 'post_install', '-at_install')
+class TestPartsBenchmark(PartsFlowCase):
+    """Time every step of the parts flow on synthetic datasets, one per
+    company, whose users belong to all the companies.
+
+    Not part of the standard test run::
+
+        odoo-bin -d <db> --test-tags parts_benchmark --stop-after-init
+
+    Results are logged and saved as JSON in the data directory; set
+    ``PARTS_BENCHMARK_BASELINE`` to a previous result file to log the
+    regressions.
+    """
+
+    def _compare(self, previous, current):
+        """Return the scenarios whose query count grew, or whose wall time grew by more than the tolerance."""
+        previous_results = {
+            (result.get('company'), result['scenario']): result for result in previous.get('results', [])
+        }
+        regressions = []
+        for result in current['results']:
+            before = previous_results.get((result.get('company'), result['scenario']))
+            if not before:
+                continue
+            name = f"{result.get('company')} {result['scenario']}"
+            if result['query_count'] > before['query_count']:
+                regressions.append(f"{name}: {before['query_count']} -> {result['query_count']} queries")
+            if result['wall_time'] > before['wall_time'] * (1 + WALL_TIME_TOLERANCE):
+                regressions.append(f"{name}: {before['wall_time']:.3f}s -> {result['wall_time']:.3f}s")
+        return regressions
+
+    def _report(self, name, results):
+        for result in results:
+            _logger.info('Benchmark %s %s: %s records, %.3fs, %s queries, %.3fs in SQL', result.get('company'),
+                         result['scenario'], result['records'], result['wall_time'], result['query_count'],
+                         result['sql_time'])
+        report = {
+            'database': self.env.cr.dbname,
+            'date': datetime.now().isoformat(),
+            'tasks': BENCHMARK_TASKS,
+            'companies': BENCHMARK_COMPANIES,
+            'results': results,
+        }
+        if BENCHMARK_BASELINE:
+            with open(BENCHMARK_BASELINE) as previous_file:
+                report['regressions'] = self._compare(json.load(previous_file), report)
+            for regression in report['regressions']:
+                _logger.warning('Benchmark regression: %s', regression)
+        output_path = os.path.join(
+            config['data_dir'], f"parts_request_{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(output_path, 'w') as output_file:
+            json.dump(report, output_file, indent=2, default=str)
+        _logger.info('Parts benchmark results saved to %s', output_path)
+
+    def _run_companies(self, prefix, **kwargs):
+        """Generate a dataset per company, share the users across the
+        companies, and return the results of every company."""
+        datasets = [
+            self._generate_dataset(f'{prefix} {index}', tasks=BENCHMARK_TASKS, **kwargs)
+            for index in range(BENCHMARK_COMPANIES)
+        ]
+        self._share_companies(datasets)
+        return [
+            dict(result, company=dataset['company'].name)
+            for dataset in datasets
+            for result in self._run_scenarios(dataset)
+        ]
+
+    def test_benchmark(self):
+        self._report('benchmark', self._run_companies('Benchmark'))
+
+    def test_benchmark_lightweight_tracking(self):
+        """Run the flow with and without chatter tracking of the statuses, side by side."""
+        tracked = self._run_companies('Tracked')
+        lightweight = self._run_companies('Lightweight', lightweight_tracking=True)
+        for before, after in zip(tracked, lightweight):
+            _logger.info('Lightweight tracking %s: %s -> %s queries, %.3fs -> %.3fs, %.3fs -> %.3fs in SQL',
+                         before['scenario'], before['query_count'], after['query_count'],
+                         before['wall_time'], after['wall_time'], before['sql_time'], after['sql_time'])
+        self._report('lightweight_tracking', [dict(result, tracking='lightweight') for result in lightweight])
@@ -0,0 +1,157 @@
+from contextlib import contextmanager
+
+from odoo.tests import tagged
+
+from .common import PartsFlowCase
+
+# maximum SQL queries of each action and portal route, for a single part
+QUERY_BUDGETS = {
+    'action_parts_request': 45,
+    'supervisor_approve': 40,
+    'quotation_send': 60,
+    'portal_approve': 50,
+    'portal_reject': 60,
+    'portal_pay': 20,
+    'request_warehouse_manager': 40,
+    'action_part_available': 40,
+    'payment_post_processing': 50,
+    'portal_receive_all': 50,
+    'portal_parts_request': 40,
+    'portal_my_tickets': 45,
+    'portal_open_tickets': 45,
+    'portal_ticket': 45,
+    'portal_ticket_parts': 30,
+}
+# queries a scenario may gain on the larger dataset (cache misses, sequences)
+QUERY_BUDGET_TOLERANCE = 3
+# number of tasks of the dataset, and of parts of the task the actions run on
+BUDGET_SCALES = (10, 100)
+LARGE_BUDGET_SCALE = 1000
+
+
+class QueryBudgetCase(PartsFlowCase):
+    """Every action and portal route of the parts flow stays within its query
+    budget, and its query count does not grow with the number of records."""
+
+    @contextmanager
+    def _assert_budget(self, counts, scenario):
+        self.env.flush_all()
+        query_count = self.cr.sql_log_count
+        with self.assertQueryCount(QUERY_BUDGETS[scenario]):
+            yield
+        counts[scenario] = self.cr.sql_log_count - query_count
+        self.env.invalidate_all()
+
+    def _generate_budget_dataset(self, scale):
+        """Return a dataset of ``scale`` tasks, the first one holding ``scale`` parts."""
+        dataset = self._generate_dataset(f'Budget {scale}', tasks=scale, parts_per_task=1)
+        reference = dataset['parts'][:1]
+        dataset['parts'] |= self.env['project.task.part'].create([{
+            'task_id': reference.task_id.id,
+            'product_id': reference.product_id.id,
+            'part_service_type': reference.part_service_type,
+            'coverage': 'chargeable' if index % 2 else 'foc',
+        } for index in range(scale - 1)])
+        return dataset
+
+    def _run_budget_scenarios(self, dataset):
+        """Measure each action and portal route once, on two new parts of the
+        first task, after the whole dataset went through the flow: the
+        actions run on a task that already holds the parts and notifications
+        of the dataset scale."""
+        self._run_scenarios(dataset)
+
+        counts = {}
+        company = dataset['company']
+        technician = dataset['technician_user']
+        supervisor_env = self._user_env(dataset, 'supervisor')
+        manager_env = self._user_env(dataset, 'manager')
+        reference = dataset['parts'].filtered(lambda p: p.coverage == 'chargeable')[:1]
+        task = dataset['tasks'][:1]
+        approved_part, rejected_part = self.env['project.task.part'].create([{
+            'task_id': task.id,
+            'product_id': reference.product_id.id,
+            'part_service_type': reference.part_service_type,
+            'coverage': 'chargeable',
+        } for _index in range(2)]).with_company(company)
+        parts = approved_part | rejected_part
+
+        with self._assert_budget(counts, 'action_parts_request'):
+            approved_part.with_user(technician).action_parts_request()
+        rejected_part.with_user(technician).action_parts_request()
+        with self._assert_budget(counts, 'supervisor_approve'):
+            approved_part.approval_notification_id.with_env(supervisor_env).action_approve()
+        rejected_part.approval_notification_id.with_env(supervisor_env).action_approve()
+
+        orders = self.env['sale.order']
+        for part in parts:
+            orders |= part._create_ticket_quotation(task, part)
+        approved_order = orders.filtered(lambda o: o.part_id == approved_part)
+        with self._assert_budget(counts, 'quotation_send'):
+            approved_order.write({'state': 'sent'})
+        (orders - approved_order).write({'state': 'sent'})
+
+        customer = dataset['customer_user']
+        self.authenticate(customer.login, customer.login)
+        csrf = {'csrf_token': self._portal_csrf_token()}
+        approved_request = approved_part.customer_approval_notification_id
+        rejected_request = rejected_part.customer_approval_notification_id
+        for scenario, url in (
+            ('portal_approve', f'/my/parts/request/{approved_request.id}/approve'),
+            ('portal_reject', f'/my/parts/request/{rejected_request.id}/reject'),
+            ('portal_pay', f'/my/parts/request/{approved_request.id}/pay'),
+        ):
+            with self._assert_budget(counts, scenario):
+                self.url_open(url, data=csrf, allow_redirects=False)
+
+        notification = approved_part.approval_notification_id
+        with self._assert_budget(counts, 'request_warehouse_manager'):
+            notification.with_env(supervisor_env).action_request_warehouse_manager()
+        with self._assert_budget(counts, 'action_part_available'):
+            notification.with_env(manager_env).action_part_available()
+
+        invoice = self._pay_orders(approved_order)
+        with self._assert_budget(counts, 'payment_post_processing'):
+            approved_order._handle_part_invoice_payment(invoice)
+
+        with self._assert_budget(counts, 'portal_receive_all'):
+            self.url_open(f'/part/receive/all/{notification.id}', data=csrf, allow_redirects=False)
+        for scenario, url in (
+            ('portal_parts_request', '/my/parts/request'),
+            ('portal_my_tickets', '/my/view'),
+            ('portal_open_tickets', '/my/open/ticket'),
+            ('portal_ticket', f'/my/ticket/{task.id}'),
+            ('portal_ticket_parts', f'/my/ticket/{task.id}/parts'),
+        ):
+            with self._assert_budget(counts, scenario):
+                self.url_open(url, allow_redirects=False)
+        return counts
+
+    def _check_scales(self, scales):
+        counts_by_scale = {
+            scale: self._run_budget_scenarios(self._generate_budget_dataset(scale)) for scale in scales
+        }
+        smallest, largest = counts_by_scale[min(scales)], counts_by_scale[max(scales)]
+        for scenario, count in largest.items():
+            with self.subTest(scenario=scenario):
+                self.assertLessEqual(
+                    count, smallest[scenario] + QUERY_BUDGET_TOLERANCE,
+                    f"{scenario}: the query count grows with the number of records")
+
+
+@tagged('post_install', '-at_install')
+class TestQueryBudgets(QueryBudgetCase):
+
+    def test_query_budgets(self):
+        self._check_scales(BUDGET_SCALES)
+
+
+@tagged('-standard', 'parts_query_budgets', 'post_install', '-at_install')
+class TestLargeQueryBudgets(QueryBudgetCase):
+    """The budgets at a thousand records, too slow for the standard run::
+
+        odoo-bin -d <db> --test-tags parts_query_budgets --stop-after-init
+    """
+
+    def test_large_query_budgets(self):
+        self._check_scales((min(BUDGET_SCALES), LARGE_BUDGET_SCALE))
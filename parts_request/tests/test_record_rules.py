@@ -0,0 +1,44 @@
+from odoo.tests import tagged
+
+from .common import PartsFlowCase
+
+# queries of a list view as a non-admin user: the count and the first page
+RULE_SEARCH_QUERIES = 2
+
+
+@tagged('post_install', '-at_install')
+class TestRecordRules(PartsFlowCase):
+    """The record rules of the approval notifications filter on columns of the
+    notification table, without joining the employees or tasks."""
+
+    def test_rule_searches(self):
+        dataset = self._generate_dataset('Rules', tasks=5)
+        parts = dataset['parts'].with_company(dataset['company'])
+        parts.with_user(dataset['technician_user']).action_parts_request()
+        notifications = parts.approval_notification_ids
+        shipped = notifications.filtered(lambda n: n.coverage == 'foc')[:1].with_env(
+            self._user_env(dataset, 'supervisor'))
+        shipped.action_approve()
+        shipped.action_request_warehouse_manager()
+        self.env.flush_all()
+
+        expected = {
+            'supervisor': notifications,
+            'manager': shipped,
+            'technician': notifications,
+        }
+        for role, visible in expected.items():
+            with self.subTest(role=role):
+                Notification = self.env['part.approval.notification'].with_env(self._user_env(dataset, role))
+                query = str(Notification._search([]))
+                self.assertNotIn('hr_employee', query)
+                self.assertNotIn('project_task"', query)
+
+                # the rules and access rights are cached by the first search
+                Notification.search_count([])
+                self.env.invalidate_all()
+                with self.assertQueryCount(RULE_SEARCH_QUERIES):
+                    count = Notification.search_count([])
+                    records = Notification.search([], limit=80)
+                self.assertEqual(count, len(visible))
+                self.assertEqual(records, visible.with_env(Notification.env))
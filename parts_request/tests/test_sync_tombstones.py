@@ -0,0 +1,53 @@
+import json
+
+from odoo.tests import tagged
+
+from .common import PartsFlowCase
+
+
+@tagged('post_install', '-at_install')
+class TestSyncTombstones(PartsFlowCase):
+    """The delta sync reports the parts of deleted tasks, and of tasks the
+    user was taken off, as deleted."""
+
+    def _sync(self, cursor=None):
+        response = self.url_open('/parts_request/api/sync', data=json.dumps({
+            'jsonrpc': '2.0', 'method': 'call', 'params': {'cursor': cursor},
+        }), headers={'Content-Type': 'application/json'})
+        result = response.json()['result']
+        self.assertFalse(result['has_more'])
+        return result
+
+    def _settle_tombstones(self):
+        # the sync skips the tombstones of the last minute, see SYNC_SETTLE_SECONDS
+        self.env.cr.execute("UPDATE part_sync_tombstone SET date = date - interval '1 hour'")
+
+    def test_deleted_task(self):
+        dataset = self._generate_dataset('Sync', tasks=2)
+        parts = dataset['parts'].with_company(dataset['company'])
+        parts.with_user(dataset['technician_user']).action_parts_request()
+        technician = dataset['technician_user']
+        self.authenticate(technician.login, technician.login)
+        cursor = self._sync()['cursor']
+
+        deleted_task, reassigned_task = dataset['tasks']
+        deleted_records = deleted_task._get_sync_records()
+        reassigned_records = reassigned_task._get_sync_records()
+        deleted_task.unlink()
+        reassigned_task.user_ids = [(3, technician.id)]
+        self.env.flush_all()
+        self._settle_tombstones()
+
+        result = self._sync(cursor)
+        self.assertFalse(result['reset'])
+        self.assertTrue(deleted_records[0] and reassigned_records[0])
+        for deleted, reassigned in zip(deleted_records, reassigned_records):
+            self.assertEqual(
+                set(result['deleted'][deleted._name]), set(deleted.ids) | set(reassigned.ids),
+                f"the deleted and reassigned {deleted._name} records are reported")
+
+        # the customer still follows the reassigned task
+        customer = dataset['customer_user']
+        self.authenticate(customer.login, customer.login)
+        result = self._sync(cursor)
+        self.assertEqual(set(result['deleted']['project.task.part']), set(deleted_records[0].ids))
@@ -0,0 +1,149 @@
+import threading
+from types import SimpleNamespace
+
+from odoo import api, SUPERUSER_ID
+from odoo.service.model import retrying
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestWorkflowLocking(TransactionCase):
+    """Concurrent transitions on the same part, each in a transaction of its own.
+
+    The records are committed by a separate cursor so that two threads can
+    see them, and deleted at the end of the test.
+    """
+
+    def _new_env(self, cr):
+        return api.Environment(cr, SUPERUSER_ID, {'mail_notify_force_send': False})
+
+    def _create_records(self):
+        with self.registry.cursor() as cr:
+            env = self._new_env(cr)
+            partner = env['res.partner'].create({'name': 'Locking Customer', 'email': 'locking@example.com'})
+            product = env['product.template'].create({'name': 'Locking Part', 'is_part': True, 'list_price': 100.0})
+            task = env['project.task'].create({
+                'name': 'Locking Call',
+                'project_id': env['project.project'].create({'name': 'Locking Project', 'is_fsm': True}).id,
+                'partner_id': partner.id,
+            })
+            service_types = env['project.task.part']._fields['part_service_type']._description_selection(env)
+            part = env['project.task.part'].create({
+                'task_id': task.id,
+                'product_id': product.id,
+                'part_service_type': service_types[0][0],
+                'coverage': 'chargeable',
+            })
+            env['part.approval.notification'].create({
+                'task_id': task.id,
+                'part_id': part.id,
+                'part_name': product.name,
+                'partner_id': partner.id,
+                'coverage': 'chargeable',
+                'status': 'waiting_customer',
+            })
+            notification = env['part.customer.approval.notification'].create({
+                'task_id': task.id,
+                'part_id': part.id,
+                'part_name': product.name,
+                'coverage': 'chargeable',
+                'stage': 'pending',
+            })
+            order = env['sale.order'].create({
+                'partner_id': partner.id,
+                'ticket_id': task.id,
+                'part_id': part.id,
+                'is_part_quotation': True,
+            })
+            ids = {'partner': partner.id, 'product': product.id, 'task': task.id, 'project': task.project_id.id,
+                   'part': part.id, 'notification': notification.id, 'order': order.id}
+        self.addCleanup(self._delete_records, ids)
+        return ids
+
+    def _delete_records(self, ids):
+        with self.registry.cursor() as cr:
+            env = self._new_env(cr)
+            env['part.status.transition'].search([('part_id', '=', ids['part'])]).unlink()
+            env['sale.order'].browse(ids['order']).unlink()
+            env['project.task.part'].browse(ids['part']).unlink()
+            env['project.task'].browse(ids['task']).unlink()
+            env['project.project'].browse(ids['project']).unlink()
+            env['product.template'].browse(ids['product']).unlink()
+            env['res.partner'].browse(ids['partner']).action_archive()
+
+    def _run(self, call, ids, barrier=None, outcome=None):
+        """Run ``call(env, ids)`` in a transaction of its own, after ``barrier``
+        once the snapshot of the transaction is taken.
+
+        The call goes through ``retrying`` like a request or a job, so that
+        concurrency errors are replayed on a new snapshot.
+        """
+        threading.current_thread().testing = True
+        try:
+            with self.registry.cursor() as cr:
+                env = self._new_env(cr)
+                # the first query takes the REPEATABLE READ snapshot
+                env['part.customer.approval.notification'].browse(ids['notification']).stage
+                if barrier:
+                    barrier.wait(timeout=30)
+                retrying(lambda: call(env, ids), env)
+        except Exception as error:
+            if outcome is None:
+                raise
+            outcome.append(error)
+        else:
+            if outcome is not None:
+                outcome.append(None)
+
+    @staticmethod
+    def _approve(env, ids):
+        env['part.customer.approval.notification'].browse(ids['notification']).action_approve()
+
+    @staticmethod
+    def _pay(env, ids):
+        paid_invoice = SimpleNamespace(amount_total=100.0, amount_residual=0.0, name='INV/LOCKING/0001')
+        env['sale.order'].browse(ids['order'])._handle_part_invoice_payment(paid_invoice)
+
+    def _assert_approved_once(self, ids):
+        with self.registry.cursor() as cr:
+            env = self._new_env(cr)
+            notification = env['part.customer.approval.notification'].browse(ids['notification'])
+            self.assertEqual(notification.stage, 'approved')
+            self.assertEqual(notification.part_id.status, 'customer_approved')
+            transitions = env['part.status.transition'].search([('part_id', '=', ids['part'])])
+            self.assertEqual(
+                sorted((t.res_model, t.field_name, t.from_state, t.to_state) for t in transitions),
+                [('part.customer.approval.notification', 'stage', 'pending', 'approved'),
+                 ('project.task.part', 'status', 'draft', 'customer_approved')],
+                "each transition is applied once",
+            )
+
+    def test_concurrent_approve_and_pay(self):
+        ids = self._create_records()
+        barrier = threading.Barrier(2)
+        outcomes = {'approve': [], 'pay': []}
+        threads = [
+            threading.Thread(target=self._run, args=(self._approve, ids, barrier, outcomes['approve'])),
+            threading.Thread(target=self._run, args=(self._pay, ids, barrier, outcomes['pay'])),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        self.assertEqual(outcomes, {'approve': [None], 'pay': [None]}, "both transactions succeed")
+        self._assert_approved_once(ids)
+
+    def test_held_lock_is_waited_for(self):
+        ids = self._create_records()
+        with self.registry.cursor() as cr:
+            env = self._new_env(cr)
+            env['project.task.part'].browse(ids['part'])._lock_workflow()
+            outcome = []
+            thread = threading.Thread(target=self._run, args=(self._approve, ids, None, outcome))
+            thread.start()
+            thread.join(timeout=2)
+            self.assertTrue(thread.is_alive(), "the approval waits for the lock")
+            cr.rollback()
+        thread.join(timeout=60)
+        self.assertEqual(outcome, [None])
+        self._assert_approved_once(ids)
@@ -0,0 +1,187 @@
+import csv
+import io
+import itertools
+import tempfile
+
+import xlsxwriter
+
+from odoo.modules.registry import Registry
+
+# rows fetched per round trip from the server side cursor
+EXPORT_CHUNK_SIZE = 2000
+# bytes per chunk of the streamed XLSX file
+EXPORT_FILE_CHUNK_SIZE = 64 * 1024
+XLSX_MAX_ROWS = 1048576
+
+# latest quotation of the part, as ``_get_quotation``, and the totals of its
+# posted invoices and credit notes
+_SALE_JOINS = """
+    LEFT JOIN LATERAL (
+        SELECT so.id, so.name, so.state, so.amount_total
+          FROM sale_order so
+         WHERE so.ticket_id = notif.task_id AND so.part_id = notif.part_id
+      ORDER BY so.date_order DESC, so.id DESC
+         LIMIT 1
+    ) quotation ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT string_agg(move.name, ', ' ORDER BY move.id) AS names,
+               SUM(move.amount_total_signed) AS amount_total,
+               SUM(move.amount_residual_signed) AS amount_residual
+          FROM account_move move
+         WHERE move.state = 'posted'
+           AND move.move_type IN ('out_invoice', 'out_refund')
+           AND move.id IN (
+                SELECT aml.move_id
+                  FROM account_move_line aml
+                  JOIN sale_order_line_invoice_rel rel ON rel.invoice_line_id = aml.id
+                  JOIN sale_order_line sol ON sol.id = rel.order_line_id
+                 WHERE sol.order_id = quotation.id
+           )
+    ) invoice ON TRUE
+"""
+
+# model -> (header, select, from clause, company column, customer column)
+EXPORT_QUERIES = {
+    'part.approval.notification': (
+        ['Ticket Number', 'Part Name', 'Product', 'Customer', 'Company', 'Warehouse', 'Coverage', 'Status',
+         'Requested On', 'Last Update', 'Quotation', 'Quotation Status', 'Quotation Amount',
+         'Invoices', 'Invoiced Amount', 'Amount Due'],
+        """notif.sequence_fsm, notif.part_name, COALESCE(tmpl.name->>%(lang)s, tmpl.name->>'en_US'),
+           partner.name, company.name, warehouse.name, notif.coverage, notif.status,
+           notif.create_date, notif.write_date""",
+        """part_approval_notification notif
+           LEFT JOIN res_partner partner ON partner.id = notif.partner_id
+           LEFT JOIN res_company company ON company.id = notif.company_id
+           LEFT JOIN stock_warehouse warehouse ON warehouse.id = notif.warehouse_id""",
+        'notif.company_id',
+        'notif.partner_id',
+    ),
+    'part.customer.approval.notification': (
+        ['Ticket Number', 'Part Name', 'Product', 'Customer', 'Company', 'Coverage', 'Stage', 'Status',
+         'Requested On', 'Last Update', 'Quotation', 'Quotation Status', 'Quotation Amount',
+         'Invoices', 'Invoiced Amount', 'Amount Due'],
+        """notif.sequence_fsm, notif.part_name, COALESCE(tmpl.name->>%(lang)s, tmpl.name->>'en_US'),
+           partner.name, company.name, notif.coverage, notif.stage, notif.status,
+           notif.create_date, notif.write_date""",
+        """part_customer_approval_notification notif
+           JOIN project_task task ON task.id = notif.task_id
+           LEFT JOIN res_partner partner ON partner.id = task.partner_id
+           LEFT JOIN res_company company ON company.id = task.company_id""",
+        'task.company_id',
+        'task.partner_id',
+    ),
+}
+
+
+def build_export_query(res_model, date_from=None, date_to=None, company_ids=None, partner_id=None,
+                       extra_where=(), extra_params=None, lang='en_US'):
+    """Return ``(header, query, params)`` exporting the notifications of ``res_model``.
+
+    The query bypasses the record rules: callers restrict it with
+    ``company_ids`` or ``partner_id``. The ``extra_where`` conditions take
+    their values from ``extra_params`` as ``%(name)s`` placeholders.
+    """
+    header, select, from_clause, company_column, partner_column = EXPORT_QUERIES[res_model]
+    where = list(extra_where)
+    params = dict(extra_params or {}, lang=lang)
+    if date_from:
+        where.append('notif.create_date >= %(date_from)s')
+        params['date_from'] = date_from
+    if date_to:
+        where.append('notif.create_date < %(date_to)s')
+        params['date_to'] = date_to
+    if company_ids is not None:
+        where.append(f'{company_column} = ANY(%(company_ids)s)')
+        params['company_ids'] = list(company_ids)
+    if partner_id is not None:
+        where.append(f'{partner_column} = %(partner_id)s')
+        params['partner_id'] = partner_id
+    query = f"""
+        SELECT {select},
+               quotation.name, quotation.state, quotation.amount_total,
+               invoice.names, invoice.amount_total, invoice.amount_residual
+          FROM {from_clause}
+     LEFT JOIN product_product product ON product.id = notif.product_id
+     LEFT JOIN product_template tmpl ON tmpl.id = product.product_tmpl_id
+          {_SALE_JOINS}
+         WHERE {' AND '.join(where) or 'TRUE'}
+      ORDER BY notif.id
+    """
+    return header, query, params
+
+
+def selection_formatter(header, selections):
+    """Return a row formatter showing the labels of the selection columns.
+
+    ``selections`` maps column titles of ``header`` to ``[(key, label)]``.
+    """
+    labels = {header.index(title): dict(selection) for title, selection in selections.items() if title in header}
+
+    def format_row(row):
+        row = list(row)
+        for index, column_labels in labels.items():
+            row[index] = column_labels.get(row[index], row[index])
+        return row
+    return format_row
+
+
+def _iter_row_chunks(dbname, query, params):
+    """Yield the rows of ``query`` by chunks, from a cursor of its own.
+
+    The response body is iterated once the request cursor is closed; a named
+    (server side) cursor keeps the result in PostgreSQL so that only one
+    chunk is held in memory at a time.
+    """
+    with Registry(dbname).cursor() as cr:
+        with cr._cnx.cursor('parts_request_export') as server_cursor:
+            server_cursor.itersize = EXPORT_CHUNK_SIZE
+            server_cursor.execute(query, params)
+            while rows := server_cursor.fetchmany(EXPORT_CHUNK_SIZE):
+                yield rows
+
+
+def stream_csv(dbname, header, query, params, formatter=None):
+    """Yield the rows of ``query`` as a UTF-8 CSV file, chunk by chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # the byte order mark lets spreadsheets detect the encoding
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    yield buffer.getvalue().encode()
+    for rows in _iter_row_chunks(dbname, query, params):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(map(formatter, rows) if formatter else rows)
+        yield buffer.getvalue().encode()
+
+
+def stream_xlsx(dbname, header, query, params, formatter=None):
+    """Yield the rows of ``query`` as an XLSX file, chunk by chunk.
+
+    The workbook is written in constant memory mode to a temporary file, which
+    is streamed once complete: memory use does not depend on the row count.
+    Rows past the sheet limit of XLSX are left out, CSV has no limit.
+    """
+    with tempfile.TemporaryFile() as output:
+        workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        })
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, header, workbook.add_format({'bold': True}))
+        chunks = _iter_row_chunks(dbname, query, params)
+        rows = itertools.islice(itertools.chain.from_iterable(chunks), XLSX_MAX_ROWS - 1)
+        for row_index, row in enumerate(rows, 1):
+            sheet.write_row(row_index, 0, formatter(row) if formatter else row)
+        # releases the database cursor when the sheet is full
+        chunks.close()
+        workbook.close()
+        output.seek(0)
+        while chunk := output.read(EXPORT_FILE_CHUNK_SIZE):
+            yield chunk
+
+
+EXPORT_STREAMS = {
+    'csv': ('text/csv; charset=utf-8', stream_csv),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
@@ -0,0 +1,155 @@
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+
+from odoo.http import request
+from odoo.models import BaseModel
+
+_logger = logging.getLogger(__name__)
+
+
+def _query_counters():
+    """Return the (query count, SQL time) counters of the current thread.
+
+    ``odoo.sql_db`` only maintains them on threads where they were set, which
+    HTTP workers do on each request; they are initialised here otherwise.
+    """
+    thread = threading.current_thread()
+    if not hasattr(thread, 'query_count'):
+        thread.query_count = 0
+        thread.query_time = 0
+    return thread.query_count, thread.query_time
+
+
+@contextmanager
+def measure_performance():
+    """Measure the wall time, SQL query count and SQL time of the enclosed block.
+
+    Yield a dict that is filled in with ``wall_time``, ``query_count`` and
+    ``sql_time`` (seconds) when the block exits, even on error.
+    """
+    stats = {}
+    query_count, query_time = _query_counters()
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        end_count, end_time = _query_counters()
+        stats.update(
+            wall_time=time.perf_counter() - start,
+            query_count=end_count - query_count,
+            sql_time=end_time - query_time,
+        )
+
+
+# Upper bounds (milliseconds) of the latency histogram buckets, the last
+# bucket holds everything above
+HISTOGRAM_BOUNDS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_buffer_lock = threading.Lock()
+_buffers = {}
+
+
+def histogram_field_names():
+    return [f'hist_{bound}ms' for bound in HISTOGRAM_BOUNDS] + ['hist_inf']
+
+
+def _histogram_index(wall_time):
+    milliseconds = wall_time * 1000
+    for index, bound in enumerate(HISTOGRAM_BOUNDS):
+        if milliseconds <= bound:
+            return index
+    return len(HISTOGRAM_BOUNDS)
+
+
+def record_sample(env, action, stats, records):
+    """Add a measurement to the per-minute buffer of the database.
+
+    Samples are aggregated in memory and written by a separate cursor once
+    the transaction of ``env`` ends, committed or rolled back, so that
+    instrumented calls neither lock nor grow the transaction they measure.
+    """
+    bucket = int(time.time() // 60 * 60)
+    with _buffer_lock:
+        buffer = _buffers.setdefault(env.registry.db_name, {})
+        sample = buffer.setdefault((action, bucket), {
+            'call_count': 0, 'total_time': 0.0, 'total_queries': 0, 'total_sql_time': 0.0,
+            'total_records': 0, 'max_time': 0.0, 'histogram': [0] * (len(HISTOGRAM_BOUNDS) + 1),
+        })
+        sample['call_count'] += 1
+        sample['total_time'] += stats['wall_time']
+        sample['total_queries'] += stats['query_count']
+        sample['total_sql_time'] += stats['sql_time']
+        sample['total_records'] += records
+        sample['max_time'] = max(sample['max_time'], stats['wall_time'])
+        sample['histogram'][_histogram_index(stats['wall_time'])] += 1
+
+    cr = env.cr
+    if not cr.postcommit.data.get('parts_request.flush_samples'):
+        cr.postcommit.data['parts_request.flush_samples'] = True
+        registry = env.registry
+        cr.postcommit.add(lambda: _flush_buffer(registry))
+        cr.postrollback.add(lambda: _flush_buffer(registry))
+
+
+def _flush_buffer(registry):
+    """Write the samples buffered for the database of ``registry``."""
+    with _buffer_lock:
+        buffer = _buffers.pop(registry.db_name, None)
+    flush_samples(registry, buffer)
+
+
+def flush_samples(registry, samples):
+    """Upsert aggregated ``samples`` into ``part_performance_metric``."""
+    if not samples:
+        return
+    columns = ['call_count', 'total_time', 'total_queries', 'total_sql_time', 'total_records'] + histogram_field_names()
+    rows = [
+        (action, datetime.utcfromtimestamp(bucket),
+         *[sample[column] for column in columns[:5]], *sample['histogram'], sample['max_time'])
+        for (action, bucket), sample in samples.items()
+    ]
+    updates = ', '.join(
+        f'{column} = part_performance_metric.{column} + EXCLUDED.{column}' for column in columns)
+    query = f"""
+        INSERT INTO part_performance_metric (action, bucket, {', '.join(columns)}, max_time)
+        VALUES %s
+        ON CONFLICT (action, bucket) DO UPDATE
+           SET {updates},
+               max_time = GREATEST(part_performance_metric.max_time, EXCLUDED.max_time)
+    """
+    try:
+        with registry.cursor() as cr:
+            execute_values(cr._obj, query, rows)
+    except Exception:
+        _logger.exception('Failed to flush %s parts performance samples', len(rows))
+
+
+def instrumented(action=None):
+    """Decorate a model method or controller route to record its performance.
+
+    Every call records its wall time, SQL query count, SQL time and number
+    of records processed under ``action`` (the qualified method name by
+    default) in ``part.performance.metric``.
+    """
+    def decorator(method):
+        name = action or method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            env = self.env if isinstance(self, BaseModel) else request.env
+            with measure_performance() as stats:
+                result = method(self, *args, **kwargs)
+            try:
+                records = len(self) if isinstance(self, BaseModel) else 1
+                record_sample(env, name, stats, records)
+            except Exception:
+                _logger.exception('Failed to record performance sample for %s', name)
+            return result
+        return wrapper
+    return decorator